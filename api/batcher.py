@@ -0,0 +1,89 @@
+import asyncio
+from typing import Dict, Any, Awaitable, Callable, Hashable
+
+class RequestCoalescer:
+    """
+    Share one in-flight run between concurrent identical requests.
+
+    Agent and orchestrator runs are multi-turn tool-calling loops, so they
+    cannot be merged into a single batched LLM prompt. Requests that are
+    exactly the same can still be answered by the same run: the first
+    caller starts it and every caller that arrives before it finishes
+    awaits the same result.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run func, or join the run already in flight for the same key.
+
+        Args:
+            key (Hashable): Identifies requests that produce the same result
+            func (Callable[[], Awaitable[Any]]): Starts the run when none is in flight
+
+        Returns:
+            Any: Result of the shared run
+        """
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._in_flight[key] = future
+
+            def _forget(done: asyncio.Future) -> None:
+                if self._in_flight.get(key) is done:
+                    del self._in_flight[key]
+
+            future.add_done_callback(_forget)
+
+        # Shield the shared run so one disconnecting caller does not cancel it for the others
+        return await asyncio.shield(future)
+
+class ConcurrencyLimiter:
+    """
+    Cap the number of runs in flight per key.
+
+    Requests beyond the cap wait for a slot instead of all hitting the LLM
+    backend at once, trading a little latency under bursts for steady
+    throughput and fewer rate-limit failures.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self._semaphores: Dict[Hashable, asyncio.Semaphore] = {}
+        # Runs holding or waiting for a slot, per key; a key's semaphore is
+        # dropped when this reaches zero, so idle or deleted keys do not pile up
+        self._users: Dict[Hashable, int] = {}
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run func once a slot for the key is free.
+
+        Args:
+            key (Hashable): Groups runs that share the cap
+            func (Callable[[], Awaitable[Any]]): Starts the run
+
+        Returns:
+            Any: Result of the run
+        """
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            semaphore = self._semaphores[key] = asyncio.Semaphore(self.max_concurrency)
+        self._users[key] = self._users.get(key, 0) + 1
+        try:
+            async with semaphore:
+                return await func()
+        finally:
+            self._users[key] -= 1
+            if not self._users[key]:
+                del self._users[key]
+                del self._semaphores[key]
+
+# Shared coalescers for the run endpoints
+agent_runs = RequestCoalescer()
+orchestrator_runs = RequestCoalescer()
+
+# Maximum number of concurrent runs of a single orchestrator
+ORCHESTRATOR_MAX_CONCURRENCY = 8
+orchestrator_slots = ConcurrencyLimiter(ORCHESTRATOR_MAX_CONCURRENCY)
@@ -1,16 +1,12 @@
 from fastapi import FastAPI, HTTPException, Body, Query, Path, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from typing import Dict, List, Any, Optional
 import os
-import sys
-import json
-from dotenv import load_dotenv
+from utils.env_utils import load_env
 import asyncio
 import uuid
 
-# Add parent directory to sys.path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 # Import existing functionality
 from models import Agent, Orchestrator, PromptField
 from utils import (
@@ -19,24 +15,27 @@ from utils import (
 )
 from executor import (
     run_orchestrator_by_id, get_conversation_history,
-    save_to_conversation_history
+    save_to_conversation_history, close_shared_orchestrator_executor
 )
 from tools.tools import get_available_tools, get_tool_by_name
+from utils.conversation_utils import load_conversation_index, load_search_index
 
 # Import routers
-from api.routers.agent import router as agent_router
-from api.routers.orchestrator import router as orchestrator_router
+from api.routers.agent import router as agent_router, close_agent_executor
+from api.routers.orchestrator import router as orchestrator_router, close_orchestrator_executor
 from api.routers.conversation import router as conversation_router
 from api.routers.streaming import router as streaming_router
+from utils.history_writer import history_writer
 
 # Load environment variables
-load_dotenv()
+load_env()
 
 # Create app instance
 app = FastAPI(
     title="Agent & Orchestrator API",
     description="API for managing and running AI agents and orchestrators",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -51,6 +50,29 @@ app.add_middleware(
 # Create data directory if it doesn't exist
 os.makedirs("data", exist_ok=True)
 
+# Build the conversation indexes once at startup if they are missing
+@app.on_event("startup")
+def build_conversation_index():
+    load_conversation_index()
+    load_search_index()
+
+# Start the write-behind queue for conversation history
+@app.on_event("startup")
+async def start_history_writer():
+    history_writer.start()
+
+# Flush queued conversation history before shutting down
+@app.on_event("shutdown")
+async def stop_history_writer():
+    await history_writer.stop()
+
+# Close the executors shared across requests
+@app.on_event("shutdown")
+async def close_executors():
+    await close_agent_executor()
+    await close_orchestrator_executor()
+    await close_shared_orchestrator_executor()
+
 # Include routers
 app.include_router(agent_router)
 app.include_router(orchestrator_router)
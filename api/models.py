@@ -1,14 +1,101 @@
+import re
+import msgspec
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
 from pydantic import BaseModel, Field
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Callable, Type, TypeVar
+
+# Request bodies on the create/update endpoints are msgspec Structs, decoded
+# straight from the raw body with body_as instead of through pydantic.
+# body_openapi publishes their schema, since FastAPI cannot see it through the dependency.
+StructT = TypeVar("StructT", bound=msgspec.Struct)
+
+# Pieces of a msgspec error path such as `$.prompt_fields[0].name`
+ERROR_PATH_PATTERN = re.compile(r"\.([^.\[]+)|\[(\d+)\]")
+MISSING_FIELD_PATTERN = re.compile(r"^Object missing required field `([^`]+)`")
+
+def _validation_errors(error: msgspec.DecodeError) -> List[Dict[str, Any]]:
+    """
+    Convert a msgspec decoding error into the {loc, msg, type} errors FastAPI reports.
+
+    Args:
+        error (msgspec.DecodeError): Malformed JSON, or a ValidationError for a schema mismatch
+
+    Returns:
+        List[Dict[str, Any]]: The errors, in the shape of a pydantic 422 detail
+    """
+    msg, _, path = str(error).partition(" - at `$")
+    loc: List[Any] = ["body"]
+    for key, index in ERROR_PATH_PATTERN.findall(path.rstrip("`")):
+        loc.append(key if key else int(index))
+
+    missing = MISSING_FIELD_PATTERN.match(msg)
+    if not isinstance(error, msgspec.ValidationError):
+        error_type = "json_invalid"
+    elif missing:
+        loc.append(missing.group(1))
+        error_type = "missing"
+    else:
+        error_type = "value_error"
+    return [{"loc": loc, "msg": msg, "type": error_type}]
+
+def body_as(struct_type: Type[StructT]) -> Callable:
+    """
+    Build a FastAPI dependency that decodes the request body into a msgspec Struct.
+
+    Args:
+        struct_type (Type[StructT]): The Struct type to decode into
+
+    Returns:
+        Callable: Dependency returning the decoded Struct, raising a 422 if the body is invalid
+    """
+    decoder = msgspec.json.Decoder(struct_type)
+
+    async def _decode(request: Request) -> StructT:
+        try:
+            return decoder.decode(await request.body())
+        except msgspec.DecodeError as e:
+            # Same response as a pydantic body failing validation
+            raise RequestValidationError(_validation_errors(e))
+
+    return _decode
+
+def _inline_refs(node: Any, defs: Dict[str, Any]) -> Any:
+    """Replace the $defs references of a JSON schema with the definitions themselves"""
+    if isinstance(node, dict):
+        if "$ref" in node:
+            return _inline_refs(defs[node["$ref"].rsplit("/", 1)[-1]], defs)
+        return {key: _inline_refs(value, defs) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_inline_refs(value, defs) for value in node]
+    return node
+
+def body_openapi(struct_type: Type[msgspec.Struct]) -> Dict[str, Any]:
+    """
+    Build the openapi_extra that documents a msgspec Struct as the route's request body.
+
+    Args:
+        struct_type (Type[msgspec.Struct]): The Struct type decoded by body_as
+
+    Returns:
+        Dict[str, Any]: Value for the route's openapi_extra
+    """
+    schema = msgspec.json.schema(struct_type)
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": _inline_refs(schema, schema.get("$defs", {}))}},
+        }
+    }
 
 # Agent models
-class PromptFieldCreate(BaseModel):
+class PromptFieldCreate(msgspec.Struct, kw_only=True):
     name: str
     description: str
     default_value: str
     required: bool = True
 
-class AgentCreate(BaseModel):
+class AgentCreate(msgspec.Struct, kw_only=True):
     name: str
     description: Optional[str] = ""
     system_prompt: str
@@ -17,7 +104,7 @@ class AgentCreate(BaseModel):
     handoff: bool = False
     prompt_fields: List[PromptFieldCreate] = []
 
-class AgentUpdate(BaseModel):
+class AgentUpdate(msgspec.Struct, kw_only=True):
     name: Optional[str] = None
     description: Optional[str] = None
     system_prompt: Optional[str] = None
@@ -37,14 +124,14 @@ class AgentResponse(BaseModel):
     prompt_fields: List[Dict[str, Any]] = []
 
 # Orchestrator models
-class OrchestratorCreate(BaseModel):
+class OrchestratorCreate(msgspec.Struct, kw_only=True):
     name: str
     description: Optional[str] = ""
     agents: List[str]  # List of agent IDs
     tools: List[str]   # List of function tool names
     system_prompt: str
 
-class OrchestratorUpdate(BaseModel):
+class OrchestratorUpdate(msgspec.Struct, kw_only=True):
     name: Optional[str] = None
     description: Optional[str] = None
     agents: Optional[List[str]] = None
@@ -1,24 +1,25 @@
 from fastapi import APIRouter, HTTPException, Body, Path, Query, Depends
+from fastapi.responses import Response
 from typing import List, Dict, Any, Optional
-import os
-import sys
 import asyncio
-
-# Add the parent directory to sys.path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import msgspec
+import orjson
+from functools import lru_cache
+from starlette.concurrency import run_in_threadpool
 
 # Import existing functionality
 from models import Agent, PromptField
 from utils import (
-    load_agents, save_agents, 
+    load_agents, load_agents_json, load_agent_json, save_agents, 
     generate_id, delete_agent
 )
 from tools.tools import get_available_tools
 from executor import AgentExecutor
+from api.batcher import agent_runs
 
 # Import API models
 from api.models import (
-    AgentCreate, AgentUpdate, AgentResponse,
+    AgentCreate, AgentUpdate, AgentResponse, body_as, body_openapi,
     AgentRunRequest, RunResponse
 )
 
@@ -29,9 +30,26 @@ router = APIRouter(
 )
 
 # Helper functions
+@lru_cache(maxsize=1)
+def get_agent_executor() -> AgentExecutor:
+    """Get the agent executor shared by all requests, so its HTTP client and connection pool are reused"""
+    return AgentExecutor()
+
+@lru_cache(maxsize=1)
+def available_tools_json() -> bytes:
+    """Serialize the available tools once, since they do not change at runtime"""
+    return orjson.dumps(get_available_tools())
+
+async def close_agent_executor() -> None:
+    """Close the shared agent executor if it was created"""
+    if get_agent_executor.cache_info().currsize:
+        await get_agent_executor().cleanup()
+        get_agent_executor.cache_clear()
+
 def agent_to_response(agent_id: str, agent_data: Dict[str, Any]) -> AgentResponse:
     """Convert agent data to response model"""
-    return AgentResponse(
+    # The data comes from our own store, so skip validation
+    return AgentResponse.model_construct(
         id=agent_id,
         name=agent_data["name"],
         description=agent_data.get("description", ""),
@@ -44,36 +62,34 @@ def agent_to_response(agent_id: str, agent_data: Dict[str, Any]) -> AgentRespons
 
 # GET all agents
 @router.get("/", response_model=List[AgentResponse])
-async def get_all_agents():
+def get_all_agents():
     """Get all agents"""
-    agents_data = load_agents()
-    return [
-        agent_to_response(agent_id, agent_data)
-        for agent_id, agent_data in agents_data.items()
-    ]
+    # Stored records already have the response shape; the encoded list is cached until the file changes
+    return Response(content=load_agents_json(), media_type="application/json")
 
 # GET agent by ID
 @router.get("/{agent_id}", response_model=AgentResponse)
-async def get_agent(agent_id: str = Path(..., description="The ID of the agent to get")):
+def get_agent(agent_id: str = Path(..., description="The ID of the agent to get")):
     """Get a specific agent by ID"""
-    agents_data = load_agents()
+    # The encoded record is cached until the file changes
+    agent_json = load_agent_json(agent_id)
     
-    if agent_id not in agents_data:
+    if agent_json is None:
         raise HTTPException(status_code=404, detail="Agent not found")
     
-    return agent_to_response(agent_id, agents_data[agent_id])
+    return Response(content=agent_json, media_type="application/json")
 
 # POST new agent
-@router.post("/", response_model=AgentResponse, status_code=201)
-async def create_agent(agent: AgentCreate):
+@router.post("/", response_model=AgentResponse, status_code=201, openapi_extra=body_openapi(AgentCreate))
+def create_agent(agent: AgentCreate = Depends(body_as(AgentCreate))):
     """Create a new agent"""
-    agents_data = load_agents()
+    agents_data = load_agents(mutable=True)
     
     # Generate ID for new agent
     agent_id = generate_id()
     
     # Convert prompt fields to dict
-    prompt_fields = [field.dict() for field in agent.prompt_fields] if agent.prompt_fields else []
+    prompt_fields = [msgspec.structs.asdict(field) for field in agent.prompt_fields] if agent.prompt_fields else []
     
     # Create new agent data
     new_agent = Agent(
@@ -96,13 +112,13 @@ async def create_agent(agent: AgentCreate):
     return agent_to_response(agent_id, agents_data[agent_id])
 
 # PUT update agent
-@router.put("/{agent_id}", response_model=AgentResponse)
-async def update_agent(
-    agent: AgentUpdate,
+@router.put("/{agent_id}", response_model=AgentResponse, openapi_extra=body_openapi(AgentUpdate))
+def update_agent(
+    agent: AgentUpdate = Depends(body_as(AgentUpdate)),
     agent_id: str = Path(..., description="The ID of the agent to update")
 ):
     """Update an existing agent"""
-    agents_data = load_agents()
+    agents_data = load_agents(mutable=True)
     
     if agent_id not in agents_data:
         raise HTTPException(status_code=404, detail="Agent not found")
@@ -124,7 +140,7 @@ async def update_agent(
     if agent.handoff is not None:
         agent_data["handoff"] = agent.handoff
     if agent.prompt_fields is not None:
-        agent_data["prompt_fields"] = [field.dict() for field in agent.prompt_fields]
+        agent_data["prompt_fields"] = [msgspec.structs.asdict(field) for field in agent.prompt_fields]
     
     # Save updated agents data
     save_agents(agents_data)
@@ -133,7 +149,7 @@ async def update_agent(
 
 # DELETE agent
 @router.delete("/{agent_id}", status_code=204)
-async def remove_agent(agent_id: str = Path(..., description="The ID of the agent to delete")):
+def remove_agent(agent_id: str = Path(..., description="The ID of the agent to delete")):
     """Delete an agent"""
     success, used_in = delete_agent(agent_id)
     
@@ -152,47 +168,46 @@ async def remove_agent(agent_id: str = Path(..., description="The ID of the agen
 
 # GET available tools
 @router.get("/tools/available", response_model=List[Dict[str, Any]])
-async def get_tools():
+def get_tools():
     """Get all available function tools for agents"""
-    return get_available_tools()
+    return Response(content=available_tools_json(), media_type="application/json")
 
 # POST run agent
 @router.post("/{agent_id}/run", response_model=RunResponse)
 async def run_agent(
     run_request: AgentRunRequest,
-    agent_id: str = Path(..., description="The ID of the agent to run")
+    agent_id: str = Path(..., description="The ID of the agent to run"),
+    agent_executor: AgentExecutor = Depends(get_agent_executor)
 ):
     """Run an agent with user input"""
-    agents_data = load_agents()
+    agents_data = await run_in_threadpool(load_agents)
     
     if agent_id not in agents_data:
         raise HTTPException(status_code=404, detail="Agent not found")
     
     agent_data = agents_data[agent_id]
     
-    # Initialize agent executor
-    agent_executor = AgentExecutor()
-    
-    try:
-        # Create agent model
-        agent_model = Agent.from_dict(agent_data)
-        
+    async def _run() -> str:
         # Create agent using the executor's method that formats prompts with user values
         agent_instance = agent_executor.create_agent_from_data(agent_data, run_request.prompt_field_values)
         
         # Run the agent
-        response = await agent_executor.run_agent(agent_instance, run_request.user_input)
-        
-        # Clean up
-        await agent_executor.cleanup()
+        return await agent_executor.run_agent(agent_instance, run_request.user_input)
+    
+    # Identical concurrent requests share a single run
+    run_key = (
+        agent_id,
+        run_request.user_input,
+        tuple(sorted((run_request.prompt_field_values or {}).items()))
+    )
+    
+    try:
+        response = await agent_runs.run(run_key, _run)
         
         return RunResponse(
             response=response,
             execution_details={"agent_id": agent_id, "agent_name": agent_data["name"]}
         )
     except Exception as e:
-        # Clean up in case of error
-        await agent_executor.cleanup()
-        
         # Re-raise as HTTP exception
-        raise HTTPException(status_code=500, detail=f"Error running agent: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error running agent: {str(e)}") 
@@ -1,9 +1,20 @@
 from fastapi import APIRouter, HTTPException, Path, Query
-from typing import List, Dict, Any, Optional
+from fastapi.responses import ORJSONResponse
+from typing import List, Dict, Any, Optional, Tuple
 import os
-import json
-import glob
-from datetime import datetime, date
+import asyncio
+import heapq
+import aiofiles
+from starlette.concurrency import run_in_threadpool
+from datetime import datetime, date, time
+
+from utils.conversation_utils import (
+    conversation_files, conversation_path, conversation_id_from_path, parse_conversation,
+    iter_conversation_file, delete_conversation as delete_conversation_files,
+    clear_conversation as clear_conversation_messages,
+    load_conversation_index, search_candidates,
+    load_response_blob
+)
 
 # Create router
 router = APIRouter(
@@ -12,18 +23,25 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-def load_conversation_file(file_path: str) -> List[Dict[str, Any]]:
-    """Load conversation history from a file"""
-    try:
-        with open(file_path, "r") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return []
-    except FileNotFoundError:
-        return []
+# Maximum number of conversation files read concurrently, to avoid exhausting file descriptors
+FILE_READ_CONCURRENCY = 32
+
+async def load_conversation_files(file_paths: List[str]) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """Load several conversation files concurrently, returning (path, history) pairs in input order"""
+    semaphore = asyncio.Semaphore(FILE_READ_CONCURRENCY)
+    
+    async def _load(file_path: str) -> Tuple[str, List[Dict[str, Any]]]:
+        async with semaphore:
+            try:
+                async with aiofiles.open(file_path, "rb") as f:
+                    return file_path, parse_conversation(file_path, await f.read())
+            except FileNotFoundError:
+                return file_path, []
+    
+    return await asyncio.gather(*[_load(file_path) for file_path in file_paths])
 
 @router.get("/", response_model=List[Dict[str, Any]])
-async def get_all_conversations():
+def get_all_conversations():
     """Get a list of all available conversations"""
     conversations_dir = "data/conversations"
     
@@ -31,39 +49,73 @@ async def get_all_conversations():
     if not os.path.exists(conversations_dir):
         return []
     
-    # Find all JSON files in the conversations directory
-    json_files = glob.glob(os.path.join(conversations_dir, "*.json"))
+    # Summaries are maintained in the index on every write, so no conversation file is opened here
+    return ORJSONResponse([
+        {"id": conversation_id, **summary}
+        for conversation_id, summary in load_conversation_index().items()
+    ])
+
+# Declared before /{conversation_id} so that path does not capture "search"
+@router.get("/search", response_model=List[Dict[str, Any]])
+async def search_conversations(
+    query: str = Query(..., description="Search term to look for in messages"),
+    limit: Optional[int] = Query(20, description="Maximum number of results to return")
+):
+    """Search all conversations for messages containing the specified query"""
+    conversations_dir = "data/conversations"
+    
+    # Ensure the directory exists; every filesystem call here runs off the event loop
+    if not await run_in_threadpool(os.path.exists, conversations_dir):
+        return ORJSONResponse([])
     
-    # Create a list of conversation summaries
-    conversation_list = []
-    for file_path in json_files:
-        conversation_id = os.path.basename(file_path).replace(".json", "")
-        history = load_conversation_file(file_path)
-        
-        # Count messages
-        message_count = len(history)
+    # Narrow the search to the messages the inverted index says may match
+    candidates = await run_in_threadpool(search_candidates, query)
+    if candidates is None:
+        json_files = await run_in_threadpool(conversation_files)
+    else:
+        # conversation_path stats the files to find legacy ones
+        json_files = await run_in_threadpool(
+            lambda: [conversation_path(conversation_id) for conversation_id in candidates]
+        )
+    
+    # Search through the candidate conversations
+    query_lower = query.lower()
+    results = []
+    for file_path, history in await load_conversation_files(json_files):
+        conversation_id = conversation_id_from_path(file_path)
         
-        # Get the latest timestamp
-        latest_timestamp = None
-        if history:
-            # Sort by timestamp (newest first)
-            sorted_history = sorted(
-                history, 
-                key=lambda x: x.get("timestamp", ""), 
-                reverse=True
-            )
-            latest_timestamp = sorted_history[0].get("timestamp", None)
+        if candidates is not None:
+            history = [history[offset] for offset in candidates[conversation_id] if offset < len(history)]
         
-        conversation_list.append({
-            "id": conversation_id,
-            "message_count": message_count,
-            "latest_timestamp": latest_timestamp
-        })
+        for message in history:
+            # Search in user messages
+            user_message = message.get("user", "")
+            if query_lower in user_message.lower():
+                result = {**message, "conversation_id": conversation_id, "match_type": "user"}
+                results.append(result)
+                
+                # Break early if we've hit the limit
+                if len(results) >= limit:
+                    return ORJSONResponse(results)
+            
+            # Search in assistant responses, checking an offloaded one in full
+            response = message.get("response", "")
+            if message.get("response_ref"):
+                full_response = await run_in_threadpool(load_response_blob, conversation_id, message["response_ref"])
+                if full_response is not None:
+                    response = full_response
+            if query_lower in response.lower():
+                result = {**message, "conversation_id": conversation_id, "match_type": "response"}
+                results.append(result)
+                
+                # Break early if we've hit the limit
+                if len(results) >= limit:
+                    return ORJSONResponse(results)
     
-    return conversation_list
+    return ORJSONResponse(results)
 
 @router.get("/{conversation_id}", response_model=List[Dict[str, Any]])
-async def get_conversation_by_id(
+def get_conversation_by_id(
     conversation_id: str = Path(..., description="The ID of the conversation to get"),
     limit: Optional[int] = Query(None, description="Limit the number of messages"),
     offset: Optional[int] = Query(None, description="Offset for pagination"),
@@ -72,45 +124,58 @@ async def get_conversation_by_id(
     end_date: Optional[date] = Query(None, description="Filter messages before this date (inclusive)")
 ):
     """Get conversation history by ID with optional filtering and pagination"""
-    file_path = f"data/conversations/{conversation_id}.json"
+    file_path = conversation_path(conversation_id)
     
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="Conversation not found")
     
-    history = load_conversation_file(file_path)
+    # Date bounds as epoch seconds, compared against the epoch stored with each message
+    start_ts = int(datetime.combine(start_date, time.min).timestamp()) if start_date else None
+    end_ts = int(datetime.combine(end_date, time.max).timestamp()) if end_date else None
     
-    # Apply date filtering if specified
-    if start_date or end_date:
-        filtered_history = []
-        for message in history:
+    def in_date_range(message: Dict[str, Any]) -> bool:
+        timestamp_epoch = message.get("timestamp_epoch")
+        if timestamp_epoch is None:
+            # Messages written before the epoch was stored only have the ISO string
             timestamp_str = message.get("timestamp", "")
             if not timestamp_str:
-                continue
-                
+                return False
+            
             try:
-                # Parse timestamp string to datetime
-                message_date = datetime.fromisoformat(timestamp_str).date()
-                
-                # Apply date range filtering
-                include_message = True
-                if start_date and message_date < start_date:
-                    include_message = False
-                if end_date and message_date > end_date:
-                    include_message = False
-                    
-                if include_message:
-                    filtered_history.append(message)
+                timestamp_epoch = int(datetime.fromisoformat(timestamp_str).timestamp())
             except (ValueError, TypeError):
                 # Skip messages with invalid timestamps
-                continue
-                
-        history = filtered_history
+                return False
+        
+        # Apply date range filtering
+        if start_ts is not None and timestamp_epoch < start_ts:
+            return False
+        if end_ts is not None and timestamp_epoch > end_ts:
+            return False
+        return True
     
-    # Sort by timestamp
-    if sort.lower() == "asc":
-        history.sort(key=lambda x: x.get("timestamp", ""))
+    messages = iter_conversation_file(file_path)
+    
+    # Apply date filtering if specified
+    if start_date or end_date:
+        messages = filter(in_date_range, messages)
+    
+    sort_key = lambda x: x.get("timestamp", "")
+    
+    # Sort by timestamp; a limited page only needs the top offset + limit
+    # messages, which a bounded heap selects without sorting the whole stream
+    if limit is not None:
+        window = (offset or 0) + limit
+        if sort.lower() == "asc":
+            history = heapq.nsmallest(window, messages, key=sort_key)
+        else:
+            history = heapq.nlargest(window, messages, key=sort_key)
     else:
-        history.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
+        history = list(messages)
+        if sort.lower() == "asc":
+            history.sort(key=sort_key)
+        else:
+            history.sort(key=sort_key, reverse=True)
     
     # Apply pagination if specified
     if offset is not None:
@@ -119,82 +184,44 @@ async def get_conversation_by_id(
     if limit is not None:
         history = history[:limit]
     
-    return history 
+    return history
 
-@router.get("/search", response_model=List[Dict[str, Any]])
-async def search_conversations(
-    query: str = Query(..., description="Search term to look for in messages"),
-    limit: Optional[int] = Query(20, description="Maximum number of results to return")
+@router.get("/{conversation_id}/responses/{response_ref}", response_model=Dict[str, Any])
+def get_conversation_response(
+    conversation_id: str = Path(..., description="The ID of the conversation"),
+    response_ref: str = Path(..., description="The response_ref of a message whose response was stored separately")
 ):
-    """Search all conversations for messages containing the specified query"""
-    conversations_dir = "data/conversations"
-    
-    # Ensure the directory exists
-    if not os.path.exists(conversations_dir):
-        return []
-    
-    # Find all JSON files in the conversations directory
-    json_files = glob.glob(os.path.join(conversations_dir, "*.json"))
-    
-    # Search through all conversations
-    results = []
-    for file_path in json_files:
-        conversation_id = os.path.basename(file_path).replace(".json", "")
-        history = load_conversation_file(file_path)
-        
-        for message in history:
-            # Search in user messages
-            user_message = message.get("user", "")
-            if query.lower() in user_message.lower():
-                result = {**message, "conversation_id": conversation_id, "match_type": "user"}
-                results.append(result)
-                
-                # Break early if we've hit the limit
-                if len(results) >= limit:
-                    return results
-            
-            # Search in assistant responses
-            response = message.get("response", "")
-            if query.lower() in response.lower():
-                result = {**message, "conversation_id": conversation_id, "match_type": "response"}
-                results.append(result)
-                
-                # Break early if we've hit the limit
-                if len(results) >= limit:
-                    return results
-    
-    return results 
+    """Get the full text of a response stored outside the conversation file"""
+    response = load_response_blob(conversation_id, response_ref)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Response not found")
+    return {"response_ref": response_ref, "response": response}
 
 @router.delete("/{conversation_id}", status_code=204)
-async def delete_conversation(
+def delete_conversation(
     conversation_id: str = Path(..., description="The ID of the conversation to delete")
 ):
     """Delete a conversation history file"""
-    file_path = f"data/conversations/{conversation_id}.json"
-    
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="Conversation not found")
-    
     try:
-        os.remove(file_path)
-        return None
+        deleted = delete_conversation_files(conversation_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting conversation: {str(e)}")
+    
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return None
 
 @router.delete("/{conversation_id}/messages", status_code=204)
-async def clear_conversation(
+def clear_conversation(
     conversation_id: str = Path(..., description="The ID of the conversation to clear")
 ):
     """Clear all messages from a conversation but keep the file"""
-    file_path = f"data/conversations/{conversation_id}.json"
-    
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="Conversation not found")
-    
     try:
-        # Write an empty array to the file
-        with open(file_path, "w") as f:
-            json.dump([], f)
-        return None
+        # Truncates to an empty JSONL file and drops the side files under one lock
+        cleared = clear_conversation_messages(conversation_id)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error clearing conversation: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error clearing conversation: {str(e)}")
+    
+    if not cleared:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return None
\ No newline at end of file
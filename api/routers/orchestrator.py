@@ -1,33 +1,30 @@
 from fastapi import APIRouter, HTTPException, Body, Path, Query, Depends, WebSocket, WebSocketDisconnect
-from fastapi.responses import StreamingResponse
-from typing import List, Dict, Any, Optional, AsyncIterable
-import os
-import sys
+from fastapi.responses import StreamingResponse, Response
+from starlette.concurrency import run_in_threadpool
+from typing import List, Dict, Any, Optional, AsyncIterable, Tuple
 import asyncio
-import json
+import orjson
 import uuid
 import datetime
+from functools import lru_cache, singledispatch
 import logger
+from agents import AgentUpdatedStreamEvent, RawResponsesStreamEvent, RunItemStreamEvent
 from runner.orchestrator import OrchestratorModelExecutor
 
-# Add the parent directory to sys.path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-
 # Import existing functionality
 from models import Orchestrator
 from utils import (
-    load_orchestrators, save_orchestrators,
+    load_orchestrators, load_orchestrators_json, load_orchestrator_json, save_orchestrators,
     generate_id, delete_orchestrator, load_agents
 )
 from tools.tools import get_available_tools
-from executor import (
-    run_orchestrator_by_id, get_conversation_history,
-    save_to_conversation_history
-)
+from executor import run_orchestrator_by_id, get_conversation_history
+from api.batcher import orchestrator_runs, orchestrator_slots
+from utils.history_writer import history_writer
 
 # Import API models
 from api.models import (
-    OrchestratorCreate, OrchestratorUpdate, OrchestratorResponse,
+    OrchestratorCreate, OrchestratorUpdate, OrchestratorResponse, body_as, body_openapi,
     OrchestratorRunRequest, RunResponse
 )
 
@@ -38,9 +35,87 @@ router = APIRouter(
 )
 
 # Helper functions
+@lru_cache(maxsize=1)
+def get_orchestrator_executor() -> OrchestratorModelExecutor:
+    """Get the orchestrator executor shared by all runs, so its HTTP client and connection pool are reused"""
+    return OrchestratorModelExecutor()
+
+def validate_agent_ids(agent_ids: List[str], agents_data: Dict[str, Any]) -> None:
+    """Raise a 400 listing every agent ID that does not exist"""
+    missing = set(agent_ids).difference(agents_data)
+    if missing:
+        # Report in request order
+        missing_ids = [agent_id for agent_id in dict.fromkeys(agent_ids) if agent_id in missing]
+        if len(missing_ids) == 1:
+            raise HTTPException(status_code=400, detail=f"Agent with ID {missing_ids[0]} not found")
+        raise HTTPException(status_code=400, detail=f"Agents with IDs {', '.join(missing_ids)} not found")
+
+def encode_event(payload: Dict[str, Any]) -> bytes:
+    """Encode a streamed event as compact JSON"""
+    return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+
+# Server-Sent Events framing around each encoded event
+SSE_PREFIX = b"data: "
+SSE_SUFFIX = b"\n\n"
+
+def sse_event(payload: Dict[str, Any]) -> bytes:
+    """Frame a streamed event as a Server-Sent Events message"""
+    return b"".join((SSE_PREFIX, encode_event(payload), SSE_SUFFIX))
+
+# The start frame never changes, so it is encoded once
+SSE_START = sse_event({"type": "start"})
+
+# Limits for coalescing WebSocket events into one frame when a client opts in to batching
+WS_BATCH_MAX_EVENTS = 16
+WS_BATCH_MAX_WAIT = 0.01  # seconds
+
+async def send_event_batches(websocket: WebSocket, events: asyncio.Queue) -> None:
+    """
+    Send queued event dictionaries over a WebSocket, coalescing bursts into one frame.
+
+    Events arriving within WS_BATCH_MAX_WAIT of the first buffered one, up to
+    WS_BATCH_MAX_EVENTS, go out together as {"type": "batch", "events": [...]};
+    a lone event is sent unwrapped. Stops after a None sentinel.
+
+    Args:
+        websocket (WebSocket): The connection to send on
+        events (asyncio.Queue): Serialized events, terminated by None
+    """
+    loop = asyncio.get_running_loop()
+    finished = False
+    while not finished:
+        event_dict = await events.get()
+        if event_dict is None:
+            return
+        
+        batch = [event_dict]
+        deadline = loop.time() + WS_BATCH_MAX_WAIT
+        while len(batch) < WS_BATCH_MAX_EVENTS:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                event_dict = await asyncio.wait_for(events.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if event_dict is None:
+                finished = True
+                break
+            batch.append(event_dict)
+        
+        payload = batch[0] if len(batch) == 1 else {"type": "batch", "events": batch}
+        await websocket.send_text(encode_event(payload).decode())
+
+async def close_orchestrator_executor() -> None:
+    """Close the shared orchestrator executor if it was created"""
+    if get_orchestrator_executor.cache_info().currsize:
+        await get_orchestrator_executor().http_client.aclose()
+        get_orchestrator_executor.cache_clear()
+
 def orchestrator_to_response(orch_id: str, orch_data: Dict[str, Any]) -> OrchestratorResponse:
     """Convert orchestrator data to response model"""
-    return OrchestratorResponse(
+    # The data comes from our own store, so skip validation
+    return OrchestratorResponse.model_construct(
         id=orch_id,
         name=orch_data["name"],
         description=orch_data.get("description", ""),
@@ -51,36 +126,32 @@ def orchestrator_to_response(orch_id: str, orch_data: Dict[str, Any]) -> Orchest
 
 # GET all orchestrators
 @router.get("/", response_model=List[OrchestratorResponse])
-async def get_all_orchestrators():
+def get_all_orchestrators():
     """Get all orchestrators"""
-    orchestrators_data = load_orchestrators()
-    return [
-        orchestrator_to_response(orch_id, orch_data)
-        for orch_id, orch_data in orchestrators_data.items()
-    ]
+    # Stored records already have the response shape; the encoded list is cached until the file changes
+    return Response(content=load_orchestrators_json(), media_type="application/json")
 
 # GET orchestrator by ID
 @router.get("/{orchestrator_id}", response_model=OrchestratorResponse)
-async def get_orchestrator(orchestrator_id: str = Path(..., description="The ID of the orchestrator to get")):
+def get_orchestrator(orchestrator_id: str = Path(..., description="The ID of the orchestrator to get")):
     """Get a specific orchestrator by ID"""
-    orchestrators_data = load_orchestrators()
+    # The encoded record is cached until the file changes
+    orchestrator_json = load_orchestrator_json(orchestrator_id)
     
-    if orchestrator_id not in orchestrators_data:
+    if orchestrator_json is None:
         raise HTTPException(status_code=404, detail="Orchestrator not found")
     
-    return orchestrator_to_response(orchestrator_id, orchestrators_data[orchestrator_id])
+    return Response(content=orchestrator_json, media_type="application/json")
 
 # POST new orchestrator
-@router.post("/", response_model=OrchestratorResponse, status_code=201)
-async def create_orchestrator(orchestrator: OrchestratorCreate):
+@router.post("/", response_model=OrchestratorResponse, status_code=201, openapi_extra=body_openapi(OrchestratorCreate))
+def create_orchestrator(orchestrator: OrchestratorCreate = Depends(body_as(OrchestratorCreate))):
     """Create a new orchestrator"""
-    orchestrators_data = load_orchestrators()
+    orchestrators_data = load_orchestrators(mutable=True)
     agents_data = load_agents()
     
     # Validate that all agent IDs exist
-    for agent_id in orchestrator.agents:
-        if agent_id not in agents_data:
-            raise HTTPException(status_code=400, detail=f"Agent with ID {agent_id} not found")
+    validate_agent_ids(orchestrator.agents, agents_data)
     
     # Generate ID for new orchestrator
     orchestrator_id = generate_id()
@@ -104,20 +175,20 @@ async def create_orchestrator(orchestrator: OrchestratorCreate):
     return orchestrator_to_response(orchestrator_id, orchestrators_data[orchestrator_id])
 
 # PUT update orchestrator
-@router.put("/{orchestrator_id}", response_model=OrchestratorResponse)
-async def update_orchestrator(
-    orchestrator: OrchestratorUpdate,
+@router.put("/{orchestrator_id}", response_model=OrchestratorResponse, openapi_extra=body_openapi(OrchestratorUpdate))
+def update_orchestrator(
+    orchestrator: OrchestratorUpdate = Depends(body_as(OrchestratorUpdate)),
     orchestrator_id: str = Path(..., description="The ID of the orchestrator to update")
 ):
     """Update an existing orchestrator"""
-    orchestrators_data = load_orchestrators()
+    orchestrators_data = load_orchestrators(mutable=True)
     agents_data = load_agents()
     
-    if orchestrator_id not in orchestrators_data:
-        raise HTTPException(status_code=404, detail="Orchestrator not found")
-    
     # Get existing orchestrator data
-    orch_data = orchestrators_data[orchestrator_id]
+    orch_data = orchestrators_data.get(orchestrator_id)
+    
+    if orch_data is None:
+        raise HTTPException(status_code=404, detail="Orchestrator not found")
     
     # Update fields if provided
     if orchestrator.name is not None:
@@ -129,9 +200,7 @@ async def update_orchestrator(
     
     # Validate and update agent IDs if provided
     if orchestrator.agents is not None:
-        for agent_id in orchestrator.agents:
-            if agent_id not in agents_data:
-                raise HTTPException(status_code=400, detail=f"Agent with ID {agent_id} not found")
+        validate_agent_ids(orchestrator.agents, agents_data)
         orch_data["agents"] = orchestrator.agents
     
     # Update tools if provided
@@ -145,7 +214,7 @@ async def update_orchestrator(
 
 # DELETE orchestrator
 @router.delete("/{orchestrator_id}", status_code=204)
-async def remove_orchestrator(orchestrator_id: str = Path(..., description="The ID of the orchestrator to delete")):
+def remove_orchestrator(orchestrator_id: str = Path(..., description="The ID of the orchestrator to delete")):
     """Delete an orchestrator"""
     if not delete_orchestrator(orchestrator_id):
         raise HTTPException(status_code=404, detail="Orchestrator not found")
@@ -156,31 +225,41 @@ async def remove_orchestrator(orchestrator_id: str = Path(..., description="The
 @router.post("/{orchestrator_id}/run", response_model=RunResponse)
 async def run_orchestrator(
     run_request: OrchestratorRunRequest,
-    orchestrator_id: str = Path(..., description="The ID of the orchestrator to run")
+    orchestrator_id: str = Path(..., description="The ID of the orchestrator to run"),
+    orchestrator_executor: OrchestratorModelExecutor = Depends(get_orchestrator_executor)
 ):
     """Run an orchestrator with user input"""
-    orchestrators_data = load_orchestrators()
+    orchestrators_data = await run_in_threadpool(load_orchestrators)
     
-    if orchestrator_id not in orchestrators_data:
+    orch_data = orchestrators_data.get(orchestrator_id)
+    
+    if orch_data is None:
         raise HTTPException(status_code=404, detail="Orchestrator not found")
     
     try:
-        orchestrator_executor = OrchestratorModelExecutor()
-        # Run orchestrator
-        result = await orchestrator_executor.run_orchestrator_Id(
-            orchestratorId=orchestrator_id,
-            user_input=run_request.user_input
+        # Run orchestrator; identical concurrent requests share a single run,
+        # and distinct runs of one orchestrator are capped to bound backend load
+        result = await orchestrator_runs.run(
+            (orchestrator_id, run_request.user_input),
+            lambda: orchestrator_slots.run(
+                orchestrator_id,
+                lambda: orchestrator_executor.run_orchestrator_Id(
+                    orchestratorId=orchestrator_id,
+                    user_input=run_request.user_input,
+                    orchestrator_data=orch_data
+                )
+            )
         )
 
 
-        #daving the conversation history 
-        save_to_conversation_history(orchestrator_id, run_request.user_input, result) 
+        # Queue the conversation history write; the shared writer saves it off the response path
+        await history_writer.submit(orchestrator_id, run_request.user_input, result)
         
         return RunResponse(
             response=result,
             execution_details={
                 "orchestrator_id": orchestrator_id,
-                "orchestrator_name": orchestrators_data[orchestrator_id]["name"],
+                "orchestrator_name": orch_data["name"],
                 # "agent_calls": result.get("agent_calls", []),
                 # "execution_log": result.get("execution_log", [])
             }
@@ -194,7 +273,8 @@ async def run_orchestrator(
 @router.websocket("/{orchestrator_id}/stream")
 async def stream_orchestrator(
     websocket: WebSocket,
-    orchestrator_id: str = Path(..., description="The ID of the orchestrator to run")
+    orchestrator_id: str = Path(..., description="The ID of the orchestrator to run"),
+    orchestrator_executor: OrchestratorModelExecutor = Depends(get_orchestrator_executor)
 ):
     """Stream an orchestrator run with WebSocket, providing real-time updates"""
     await websocket.accept()
@@ -202,40 +282,66 @@ async def stream_orchestrator(
     try:
         # Get input from client
         data = await websocket.receive_text()
-        run_data = json.loads(data)
+        run_data = orjson.loads(data)
         user_input = run_data.get("user_input", "")
+        # Clients that understand "batch" frames can opt in to coalesced delivery
+        batch_events = bool(run_data.get("batch", False))
+        
+        # Read both stores off the event loop, concurrently
+        orchestrators_data, agents_data = await asyncio.gather(
+            run_in_threadpool(load_orchestrators), run_in_threadpool(load_agents)
+        )
         
-        orchestrators_data = load_orchestrators()
+        orch_data = orchestrators_data.get(orchestrator_id)
         
-        if orchestrator_id not in orchestrators_data:
-            await websocket.send_json({"type": "error", "message": "Orchestrator not found"})
+        if orch_data is None:
+            await websocket.send_text(encode_event({"type": "error", "message": "Orchestrator not found"}).decode())
             await websocket.close()
             return
         
+        sender = None
         try:
-            orchestrator_executor = OrchestratorModelExecutor()
             # Stream orchestrator run
-            async for event in orchestrator_executor.stream_orchestrator_run_by_id(
+            streaming_result = orchestrator_executor.start_orchestrator_stream(
                 orchestratorId=orchestrator_id,
-                user_input=user_input
-            ):
+                user_input=user_input,
+                orchestrator_data=orch_data,
+                agents_data=agents_data
+            )
+            if batch_events:
+                events = asyncio.Queue()
+                sender = asyncio.create_task(send_event_batches(websocket, events))
+            
+            async for event in streaming_result.stream_events():
                 # Send event to client - use the serializer to ensure JSON compatibility
                 event_dict = serialize_event(event)
-                await websocket.send_json(event_dict)
+                if sender is not None:
+                    if sender.done():
+                        # The sender stopped early (e.g. the client went away); surface its error
+                        await sender
+                    events.put_nowait(event_dict)
+                else:
+                    await websocket.send_text(encode_event(event_dict).decode())
+            
+            # Flush any buffered events before completing
+            if sender is not None:
+                events.put_nowait(None)
+                await sender
             
             # Save the conversation history after streaming is complete
-            # Get the final result from the executor
-            final_result = orchestrator_executor.get_last_run_result()
-            save_to_conversation_history(orchestrator_id, user_input, final_result)
+            final_result = streaming_result.final_output
+            await history_writer.submit(orchestrator_id, user_input, final_result)
             
             # Send completion event
-            await websocket.send_json({"type": "complete", "final_output": final_result})
+            await websocket.send_text(encode_event({"type": "complete", "final_output": final_result}).decode())
             
         except Exception as e:
+            if sender is not None:
+                sender.cancel()
             # Log the error
             logger.error(f"WebSocket Streaming error: {str(e)}")
             # Send error to client
-            await websocket.send_json({"type": "error", "message": f"Error running orchestrator: {str(e)}"})
+            await websocket.send_text(encode_event({"type": "error", "message": f"Error running orchestrator: {str(e)}"}).decode())
             
     except WebSocketDisconnect:
         # Handle client disconnect
@@ -245,7 +351,7 @@ async def stream_orchestrator(
         logger.error(f"WebSocket connection error: {str(e)}")
         # Send error to client if connection is still open
         if websocket.client_state.value != 0:  # Not closed
-            await websocket.send_json({"type": "error", "message": f"Error: {str(e)}"})
+            await websocket.send_text(encode_event({"type": "error", "message": f"Error: {str(e)}"}).decode())
     finally:
         # Ensure websocket is closed
         if websocket.client_state.value != 0:  # Not closed
@@ -255,46 +361,52 @@ async def stream_orchestrator(
 @router.post("/{orchestrator_id}/stream-sse")
 async def stream_orchestrator_sse(
     run_request: OrchestratorRunRequest,
-    orchestrator_id: str = Path(..., description="The ID of the orchestrator to run")
+    orchestrator_id: str = Path(..., description="The ID of the orchestrator to run"),
+    orchestrator_executor: OrchestratorModelExecutor = Depends(get_orchestrator_executor)
 ):
     """Stream an orchestrator run using Server-Sent Events (SSE)"""
     
-    orchestrators_data = load_orchestrators()
+    # Read both stores off the event loop, concurrently
+    orchestrators_data, agents_data = await asyncio.gather(
+        run_in_threadpool(load_orchestrators), run_in_threadpool(load_agents)
+    )
     
-    if orchestrator_id not in orchestrators_data:
+    orch_data = orchestrators_data.get(orchestrator_id)
+    
+    if orch_data is None:
         raise HTTPException(status_code=404, detail="Orchestrator not found")
     
-    async def event_generator() -> AsyncIterable[str]:
+    async def event_generator() -> AsyncIterable[bytes]:
         try:
-            orchestrator_executor = OrchestratorModelExecutor()
-            
             # Stream header
-            yield "data: " + json.dumps({"type": "start"}) + "\n\n"
+            yield SSE_START
             
             # Stream events
-            async for event in orchestrator_executor.stream_orchestrator_run_by_id(
+            streaming_result = orchestrator_executor.start_orchestrator_stream(
                 orchestratorId=orchestrator_id,
-                user_input=run_request.user_input
-            ):
+                user_input=run_request.user_input,
+                orchestrator_data=orch_data,
+                agents_data=agents_data
+            )
+            async for event in streaming_result.stream_events():
                 # Convert event to serializable dictionary
                 event_dict = serialize_event(event)
                 
                 # Send event
-                yield "data: " + json.dumps(event_dict) + "\n\n"
+                yield sse_event(event_dict)
             
             # Save the conversation history after streaming is complete
-            # Get the final result from the executor
-            final_result = orchestrator_executor.get_last_run_result()
-            save_to_conversation_history(orchestrator_id, run_request.user_input, final_result)
+            final_result = streaming_result.final_output
+            await history_writer.submit(orchestrator_id, run_request.user_input, final_result)
             
             # Send completion event
-            yield "data: " + json.dumps({"type": "complete", "final_output": final_result}) + "\n\n"
+            yield sse_event({"type": "complete", "final_output": final_result})
             
         except Exception as e:
             # Send error event
             error_msg = f"Error running orchestrator: {str(e)}"
             logger.error(f"SSE Streaming error: {error_msg}")
-            yield "data: " + json.dumps({"type": "error", "message": error_msg}) + "\n\n"
+            yield sse_event({"type": "error", "message": error_msg})
             raise HTTPException(status_code=500, detail=error_msg)
     
     return StreamingResponse(
@@ -307,9 +419,129 @@ async def stream_orchestrator_sse(
         }
     )
 
+def _serialize_data(attr_value: Any) -> Any:
+    """Serialize an event's data attribute, which might contain a ResponseTextDeltaEvent"""
+    if hasattr(attr_value, "delta"):
+        return {"delta": attr_value.delta}
+    if hasattr(attr_value, "to_dict"):
+        # If it has a to_dict method, use it
+        return attr_value.to_dict()
+    # For other types, try to get basic attributes
+    try:
+        # Try to convert to dict
+        data = {"type": attr_value.__class__.__name__}
+        
+        # Add common attributes if they exist
+        for data_attr in ["id", "content", "text", "message", "status"]:
+            if hasattr(attr_value, data_attr):
+                data[data_attr] = getattr(attr_value, data_attr)
+        return data
+    except:
+        # If all else fails, just use the string representation
+        return str(attr_value)
+
+def _serialize_item(attr_value: Any) -> Any:
+    """Serialize an event's item attribute, which might be a RunItem instance"""
+    try:
+        # Try to_dict first
+        if hasattr(attr_value, "to_dict"):
+            return attr_value.to_dict()
+        
+        # Fall back to manual extraction
+        item_dict = {"type": getattr(attr_value, "type", "unknown")}
+        
+        # Common attributes for all items
+        for item_attr in ["id", "run_id", "tool_name"]:
+            if hasattr(attr_value, item_attr):
+                item_dict[item_attr] = getattr(attr_value, item_attr)
+        
+        # Message specific attributes
+        if hasattr(attr_value, "message"):
+            message = getattr(attr_value, "message")
+            if hasattr(message, "content"):
+                item_dict["message"] = {"content": message.content}
+            else:
+                item_dict["message"] = str(message)
+        
+        # Tool output
+        if hasattr(attr_value, "output"):
+            item_dict["output"] = str(getattr(attr_value, "output"))
+        
+        return item_dict
+    except Exception as e:
+        # If there's an error, log it and use a simpler representation
+        logger.debug(f"Error serializing item: {str(e)}")
+        return {"type": attr_value.__class__.__name__}
+
+def _serialize_new_agent(attr_value: Any) -> Any:
+    """Serialize an event's new_agent attribute, which might be an Agent instance"""
+    if hasattr(attr_value, "name"):
+        return attr_value.name
+    return str(attr_value)
+
+def _serialize_timestamp(attr_value: Any) -> str:
+    """Serialize an event's timestamp attribute"""
+    if isinstance(attr_value, (datetime.datetime, datetime.date)):
+        return attr_value.isoformat()
+    return str(attr_value)
+
+# Scalar types that encode to JSON as-is
+_JSON_SCALARS = (str, int, float, bool, type(None))
+
+def _is_json_safe(value: Any) -> bool:
+    """Check by type whether a value encodes to JSON as-is, without encoding it"""
+    if isinstance(value, _JSON_SCALARS):
+        return True
+    if isinstance(value, (list, tuple)):
+        return all(_is_json_safe(element) for element in value)
+    if isinstance(value, dict):
+        return all(
+            isinstance(key, _JSON_SCALARS) and _is_json_safe(element)
+            for key, element in value.items()
+        )
+    return False
+
+def _serialize_value(attr_value: Any) -> Any:
+    """Keep a value that is JSON serializable, otherwise convert it to a string"""
+    return attr_value if _is_json_safe(attr_value) else str(attr_value)
+
+# Attributes that need special handling when serializing an event
+_ATTRIBUTE_SERIALIZERS = {
+    "data": _serialize_data,
+    "item": _serialize_item,
+    "new_agent": _serialize_new_agent,
+    "timestamp": _serialize_timestamp,
+}
+
+# Public data attribute names of each event type seen so far, so dir() runs once
+# per type, and whether they all live in the instance __dict__ (true for the
+# SDK's dataclass events) so their values can be read without getattr
+_EVENT_ATTRIBUTES: Dict[type, Tuple[List[str], bool]] = {}
+
+def _event_attributes(event: Any) -> Tuple[List[str], bool]:
+    """Get the public, non-callable attribute names of an event's type and whether vars() holds them all"""
+    event_type = type(event)
+    attributes = _EVENT_ATTRIBUTES.get(event_type)
+    if attributes is None:
+        attr_names = [
+            attr_name for attr_name in dir(event)
+            # Skip private attributes, methods, and "type" which is handled separately
+            if not attr_name.startswith('_') and attr_name != "type"
+            and not callable(getattr(event, attr_name))
+        ]
+        instance_dict = getattr(event, "__dict__", None)
+        in_instance_dict = instance_dict is not None and all(attr_name in instance_dict for attr_name in attr_names)
+        attributes = (attr_names, in_instance_dict)
+        _EVENT_ATTRIBUTES[event_type] = attributes
+    return attributes
+
+@singledispatch
 def serialize_event(event):
     """Convert an event object to a serializable dictionary
     
+    The SDK's stream event types have dedicated serializers registered below;
+    this reflective version only handles event types they do not cover.
+    
     Args:
         event: The event object to serialize
         
@@ -319,100 +551,46 @@ def serialize_event(event):
     # Base event dictionary with type
     event_dict = {"type": getattr(event, "type", "unknown_event_type")}
     
-    # For each attribute in the event, try to add it to the dictionary in a serializable form
-    for attr_name in dir(event):
-        # Skip private attributes and methods
-        if attr_name.startswith('_') or callable(getattr(event, attr_name)):
+    # For each attribute of the event's type, add it to the dictionary in a serializable form
+    attr_names, in_instance_dict = _event_attributes(event)
+    values = vars(event) if in_instance_dict else None
+    for attr_name in attr_names:
+        attr_value = values[attr_name] if values is not None else getattr(event, attr_name)
+        if callable(attr_value):
             continue
-            
-        # Get the attribute value
-        attr_value = getattr(event, attr_name)
-        
-        # Handle specific attribute types
-        if attr_name == "data":
-            # Handle data attribute, which might contain ResponseTextDeltaEvent
-            if hasattr(attr_value, "delta"):
-                event_dict["data"] = {"delta": attr_value.delta}
-            elif hasattr(attr_value, "to_dict"):
-                # If it has a to_dict method, use it
-                event_dict["data"] = attr_value.to_dict()
-            else:
-                # For other types, try to get basic attributes
-                try:
-                    # Try to convert to dict
-                    event_dict["data"] = {"type": attr_value.__class__.__name__}
-                    
-                    # Add common attributes if they exist
-                    for data_attr in ["id", "content", "text", "message", "status"]:
-                        if hasattr(attr_value, data_attr):
-                            event_dict["data"][data_attr] = getattr(attr_value, data_attr)
-                except:
-                    # If all else fails, just use the string representation
-                    event_dict["data"] = str(attr_value)
-        
-        elif attr_name == "item":
-            # Handle item attribute, which might be a RunItem instance
-            try:
-                # Try to_dict first
-                if hasattr(attr_value, "to_dict"):
-                    event_dict["item"] = attr_value.to_dict()
-                else:
-                    # Fall back to manual extraction
-                    item_dict = {"type": getattr(attr_value, "type", "unknown")}
-                    
-                    # Common attributes for all items
-                    for item_attr in ["id", "run_id", "tool_name"]:
-                        if hasattr(attr_value, item_attr):
-                            item_dict[item_attr] = getattr(attr_value, item_attr)
-                    
-                    # Message specific attributes
-                    if hasattr(attr_value, "message"):
-                        message = getattr(attr_value, "message")
-                        if hasattr(message, "content"):
-                            item_dict["message"] = {"content": message.content}
-                        else:
-                            item_dict["message"] = str(message)
-                    
-                    # Tool output
-                    if hasattr(attr_value, "output"):
-                        item_dict["output"] = str(getattr(attr_value, "output"))
-                    
-                    event_dict["item"] = item_dict
-            except Exception as e:
-                # If there's an error, log it and use a simpler representation
-                logger.debug(f"Error serializing item: {str(e)}")
-                event_dict["item"] = {"type": attr_value.__class__.__name__}
         
-        elif attr_name == "new_agent":
-            # Handle new_agent attribute, which might be an Agent instance
-            if attr_value is not None:
-                if hasattr(attr_value, "name"):
-                    event_dict["new_agent"] = attr_value.name
-                else:
-                    event_dict["new_agent"] = str(attr_value)
-        
-        elif attr_name == "timestamp":
-            # Handle timestamp attribute
-            if isinstance(attr_value, (datetime.datetime, datetime.date)):
-                event_dict["timestamp"] = attr_value.isoformat()
-            else:
-                event_dict["timestamp"] = str(attr_value)
-        
-        elif attr_name not in ["type"]:  # We already handled "type" 
-            # For all other attributes, serialize if possible
-            try:
-                # Try to directly serialize the value
-                json.dumps({attr_name: attr_value})
-                event_dict[attr_name] = attr_value
-            except (TypeError, OverflowError):
-                # If the value is not JSON serializable, convert it to a string
-                event_dict[attr_name] = str(attr_value)
+        serializer = _ATTRIBUTE_SERIALIZERS.get(attr_name)
+        if serializer is None:
+            event_dict[attr_name] = _serialize_value(attr_value)
+        elif attr_name == "new_agent" and attr_value is None:
+            # A missing new agent is left out
+            continue
+        else:
+            event_dict[attr_name] = serializer(attr_value)
     
     return event_dict
 
+@serialize_event.register
+def _serialize_raw_response_event(event: RawResponsesStreamEvent) -> Dict[str, Any]:
+    """Serialize a raw LLM response event, such as a text delta"""
+    return {"type": event.type, "data": _serialize_data(event.data)}
+
+@serialize_event.register
+def _serialize_run_item_event(event: RunItemStreamEvent) -> Dict[str, Any]:
+    """Serialize a run item event, such as a message, tool call or tool output"""
+    return {"type": event.type, "item": _serialize_item(event.item), "name": _serialize_value(event.name)}
+
+@serialize_event.register
+def _serialize_agent_updated_event(event: AgentUpdatedStreamEvent) -> Dict[str, Any]:
+    """Serialize an agent switch event"""
+    event_dict = {"type": event.type}
+    if event.new_agent is not None:
+        event_dict["new_agent"] = _serialize_new_agent(event.new_agent)
+    return event_dict
+
 # GET conversation history for orchestrator
 @router.get("/{orchestrator_id}/history", response_model=List[Dict[str, Any]])
-async def get_history(orchestrator_id: str = Path(..., description="The ID of the orchestrator")):
+def get_history(orchestrator_id: str = Path(..., description="The ID of the orchestrator")):
     """Get conversation history for an orchestrator"""
     orchestrators_data = load_orchestrators()
     
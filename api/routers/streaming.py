@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Request, Query
 from fastapi.responses import StreamingResponse
 import os
 import asyncio
+import aiofiles
 from typing import AsyncGenerator
 
 router = APIRouter(
@@ -10,33 +11,45 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-async def stream_data_generator() -> AsyncGenerator[str, None]:
+async def stream_data_generator(chunk_lines: int = 1, interval: float = 0.1) -> AsyncGenerator[bytes, None]:
     """
-    Generator that reads the data file line by line and yields each line
-    with a small delay to simulate streaming.
+    Generator that reads the data file and yields its lines in batches
+    with a small delay between batches to simulate streaming.
+    
+    Args:
+        chunk_lines (int): Number of lines sent per chunk
+        interval (float): Delay in seconds between chunks
     """
     data_file_path = os.path.join("data", "streaming_data_2.txt")
     
     try:
-        with open(data_file_path, "r") as file:
-            for line in file:
-                # Add a small delay to simulate real-time streaming
-                await asyncio.sleep(0.1)
-                yield f"{line}"
+        # Read the file once without blocking the event loop
+        async with aiofiles.open(data_file_path, "rb") as file:
+            lines = (await file.read()).splitlines(keepends=True)
     except Exception as e:
-        yield f"data: {{'error': '{str(e)}'}}\n\n"
+        yield f"data: {{'error': '{str(e)}'}}\n\n".encode()
+        return
+    
+    for start in range(0, len(lines), chunk_lines):
+        # Add a small delay to simulate real-time streaming
+        await asyncio.sleep(interval)
+        yield b"".join(lines[start:start + chunk_lines])
 
 @router.get("/demo-sse-streaming")
-async def demo_sse_streaming(request: Request) -> StreamingResponse:
+async def demo_sse_streaming(
+    request: Request,
+    chunk_lines: int = Query(1, ge=1, description="Number of lines sent per chunk"),
+    interval: float = Query(0.1, ge=0, description="Delay in seconds between chunks")
+) -> StreamingResponse:
     """
     Stream the content of data/streaming_data_2.txt as Server-Sent Events.
     """
     return StreamingResponse(
-        stream_data_generator(),
+        stream_data_generator(chunk_lines, interval),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
             "X-Accel-Buffering": "no",  # Disable proxy buffering
         }
-    ) 
\ No newline at end of file
+    )
@@ -1,30 +1,38 @@
 import os
-import sys
 import uvicorn
-from dotenv import load_dotenv
-
-# Add the current directory to the Python path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
-# Load environment variables
-load_dotenv()
-
-# Check for OpenAI API key
-if not os.getenv("OPENAI_API_KEY"):
-    print("WARNING: OPENAI_API_KEY not found in environment variables.")
-    print("You must set this environment variable to use the agent and orchestrator functionality.")
+from utils.env_utils import load_env
+from utils.conversation_utils import CROSS_PROCESS_LOCKING
 
 def start_api():
     """Start the FastAPI application with uvicorn server"""
-    # Import the FastAPI app
-    from api.main import app
+    # Load environment variables
+    load_env()
+    
+    # Check for OpenAI API key
+    if not os.getenv("OPENAI_API_KEY"):
+        print("WARNING: OPENAI_API_KEY not found in environment variables.")
+        print("You must set this environment variable to use the agent and orchestrator functionality.")
+    
+    # Auto-reload only in development (DEV=1); it runs a file watcher and cannot
+    # be combined with multiple workers, so WORKERS is ignored while it is on
+    dev = os.getenv("DEV", "0") == "1"
+    workers = int(os.getenv("WORKERS", "1"))
+    
+    # Conversation writes from several workers are only serialized with flock
+    if workers > 1 and not CROSS_PROCESS_LOCKING:
+        print("WARNING: WORKERS > 1 needs file locking (flock), which this platform lacks.")
+        print("Running a single worker so conversation history, listing and search stay consistent.")
+        workers = 1
     
-    # Run the server with uvicorn
+    # Run the server with uvicorn; it imports the app itself from the import string
     uvicorn.run(
         "api.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True  # Enable auto-reload for development
+        workers=None if dev else workers,
+        loop="auto",  # Picks uvloop when it is installed
+        http="auto",  # Picks httptools when it is installed
+        reload=dev
     )
 
 if __name__ == "__main__":
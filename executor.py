@@ -1,26 +1,36 @@
 import os
-import json
-from typing import Dict, Any, List, Optional
-from dotenv import load_dotenv
+from typing import Dict, Any, List, Optional, Set, Tuple
+from utils.env_utils import load_env
 import asyncio
 import sys
-import datetime
+import hashlib
+import orjson
+from collections import OrderedDict
+from functools import lru_cache
 
 # Import agents SDK
 from agents import Agent, Runner, RunConfig
 
 # Import utilities and models
-from models import Orchestrator, Agent as AgentModel, PromptField
-from utils import load_agents, load_orchestrators
-from tools.tools import get_tool_by_name
+from models import Orchestrator, Agent as AgentModel, PromptField, PLACEHOLDER_PATTERN
+from utils import load_agents, load_orchestrators, save_agents
+from tools.tools import get_tool_functions
 import logger as logger
 from utils.ssl_utils import setup_ssl_bypass
+from utils.openai_limits import run_with_openai_limits
+from utils.conversation_utils import (
+    load_conversation,
+    write_conversation,
+    append_conversation_messages,
+    resolve_response,
+)
+from utils.history_writer import build_history_entry, history_writer
 
-# Import the CustomAgentHooks class
-from utils.agent_hooks import CustomAgentHooks
+# Import the shared agent hooks
+from utils.agent_hooks import hooks_for
 
 # Load environment variables
-load_dotenv()
+load_env()
 
 # Create directory for conversation history if it doesn't exist
 os.makedirs("data/conversations", exist_ok=True)
@@ -37,7 +47,7 @@ def generate_agent_prompt_fields(agent_id: str) -> Dict[str, Any]:
         Dict[str, Any]: Dictionary of field values entered by the user
     """
     # Load agents
-    agents_data = load_agents()
+    agents_data = load_agents(mutable=True)
     
     if agent_id not in agents_data:
         st.error(f"Agent with ID {agent_id} not found")
@@ -55,7 +65,6 @@ def generate_agent_prompt_fields(agent_id: str) -> Dict[str, Any]:
         
         # Save the updated agent with prompt fields
         agents_data[agent_id] = agent_model.to_dict()
-        from src.utils import save_agents
         save_agents(agents_data)
     
     # Create form for prompt fields
@@ -75,6 +84,160 @@ def generate_agent_prompt_fields(agent_id: str) -> Dict[str, Any]:
     
     return user_values
 
+def has_format_fields(text: str) -> bool:
+    """Check whether str.format could change the text, i.e. it contains any braces"""
+    return '{' in text or '}' in text
+
+# Cost per token in nano-dollars as (prompt, completion) by model name prefix,
+# so costs stay exact integers until converted to dollars
+MODEL_COST_NANO_PER_TOKEN = {
+    "gpt-4o-mini": (150, 600),    # $0.15 and $0.60 per 1M tokens
+    "gpt-4o": (2_500, 10_000),    # $2.50 and $10 per 1M tokens
+    "gpt-4": (10_000, 30_000),    # $0.01 and $0.03 per 1K tokens
+}
+# Rates used when the model is not set or not in the table
+DEFAULT_COST_NANO_PER_TOKEN = MODEL_COST_NANO_PER_TOKEN["gpt-4"]
+NANO_DOLLARS_PER_DOLLAR = 1_000_000_000
+
+# Token counts reported in a usage record
+TOKEN_USAGE_KEYS = ('prompt_tokens', 'completion_tokens', 'total_tokens')
+
+def _trace_usage(result: Any) -> Any:
+    """Usage recorded on the run's trace"""
+    trace = getattr(result, 'trace', None)
+    return getattr(trace, 'usage', None) if trace is not None else None
+
+def _trace_item_usage(result: Any) -> Any:
+    """Usage recorded on the first trace item that has any"""
+    trace = getattr(result, 'trace', None)
+    for item in getattr(trace, 'trace_items', None) or []:
+        if getattr(item, 'usage', None):
+            return item.usage
+    return None
+
+def _result_usage(result: Any) -> Any:
+    """Usage recorded on the result itself"""
+    return getattr(result, 'usage', None) or None
+
+def _run_usage(result: Any) -> Any:
+    """Usage recorded on the result's run"""
+    return getattr(getattr(result, 'run', None), 'usage', None) or None
+
+def _response_usage(result: Any) -> Any:
+    """Usage recorded on the result's response"""
+    return getattr(getattr(result, 'response', None), 'usage', None) or None
+
+# Places token usage may be found on a run result, in order of preference
+_USAGE_PROBES = (_trace_usage, _trace_item_usage, _result_usage, _run_usage, _response_usage)
+
+# The probe that last found usage; the SDK version in use does not change
+# between runs, so it is tried first
+_last_usage_probe = _USAGE_PROBES[0]
+
+def find_token_usage(result: Any) -> Any:
+    """
+    Find the token usage record of a run result.
+    
+    Depending on the SDK version, usage lives on the trace, on one of the
+    trace items, or on the result itself, its run or its response. The place
+    that worked last time is tried first, then the rest in that order.
+    
+    Args:
+        result (Any): Result returned by Runner.run
+        
+    Returns:
+        Any: The usage record, a dict or an object, or None if there is none
+    """
+    global _last_usage_probe
+    usage_data = _last_usage_probe(result)
+    if usage_data is not None:
+        return usage_data
+    
+    for probe in _USAGE_PROBES:
+        if probe is _last_usage_probe:
+            continue
+        usage_data = probe(result)
+        if usage_data is not None:
+            _last_usage_probe = probe
+            return usage_data
+    return None
+
+def extract_token_usage(usage_data: Any) -> Dict[str, int]:
+    """
+    Read the token counts from a usage record.
+    
+    Args:
+        usage_data (Any): Usage record, either a dict or an object
+        
+    Returns:
+        Dict[str, int]: Prompt, completion and total token counts
+    """
+    if isinstance(usage_data, dict):
+        return {key: usage_data.get(key, 0) or 0 for key in TOKEN_USAGE_KEYS}
+    return {key: getattr(usage_data, key, 0) or 0 for key in TOKEN_USAGE_KEYS}
+
+@lru_cache(maxsize=None)
+def cost_rates(model: Optional[str]) -> Tuple[int, int]:
+    """
+    Resolve the per-token rates of a model, once per model name.
+    
+    The longest matching prefix in MODEL_COST_NANO_PER_TOKEN wins, so dated
+    snapshots such as gpt-4o-2024-08-06 use their family's rates.
+    
+    Args:
+        model (Optional[str]): Model name, or None for the SDK default model
+        
+    Returns:
+        Tuple[int, int]: Prompt and completion cost per token in nano-dollars
+    """
+    if model:
+        for name in sorted(MODEL_COST_NANO_PER_TOKEN, key=len, reverse=True):
+            if model.startswith(name):
+                return MODEL_COST_NANO_PER_TOKEN[name]
+    return DEFAULT_COST_NANO_PER_TOKEN
+
+def model_name(agent: Agent) -> Optional[str]:
+    """Get the model name an agent is configured with, if it is set by name"""
+    model = getattr(agent, 'model', None)
+    return model if isinstance(model, str) else None
+
+def token_cost(prompt_tokens: int, completion_tokens: int, model: Optional[str] = None) -> Tuple[int, int]:
+    """
+    Compute the prompt and completion cost of a run in nano-dollars.
+    
+    Args:
+        prompt_tokens (int): Number of prompt tokens
+        completion_tokens (int): Number of completion tokens
+        model (Optional[str]): Model that served the run
+        
+    Returns:
+        Tuple[int, int]: Prompt and completion cost in nano-dollars
+    """
+    prompt_rate, completion_rate = cost_rates(model)
+    return prompt_tokens * prompt_rate, completion_tokens * completion_rate
+
+def cost_in_dollars(prompt_cost: int, completion_cost: int) -> Dict[str, float]:
+    """Convert prompt and completion costs in nano-dollars to the cost breakdown in dollars"""
+    return {
+        'prompt_cost': prompt_cost / NANO_DOLLARS_PER_DOLLAR,
+        'completion_cost': completion_cost / NANO_DOLLARS_PER_DOLLAR,
+        'total_cost': (prompt_cost + completion_cost) / NANO_DOLLARS_PER_DOLLAR
+    }
+
+def compute_cost(prompt_tokens: int, completion_tokens: int, model: Optional[str] = None) -> Dict[str, float]:
+    """
+    Compute the cost of a run from its token counts.
+    
+    Args:
+        prompt_tokens (int): Number of prompt tokens
+        completion_tokens (int): Number of completion tokens
+        model (Optional[str]): Model that served the run
+        
+    Returns:
+        Dict[str, float]: Prompt, completion and total cost in dollars
+    """
+    return cost_in_dollars(*token_cost(prompt_tokens, completion_tokens, model))
+
 class AgentExecutor:
     """Executes agents with OpenAI API using the agents SDK"""
     
@@ -111,205 +274,41 @@ class AgentExecutor:
                 # collect_message_trace=True
             )
             
-            # Run the agent using the Runner from the SDK
-            result = await Runner.run(
+            # Run the agent using the Runner from the SDK, capping concurrent runs
+            # and retrying rate-limit errors with backoff
+            result = await run_with_openai_limits(lambda: Runner.run(
                 agent,
                 user_input,
                 run_config=run_config
-            )
+            ))
+            
+            final_output = getattr(result, 'final_output', None)
             
             # Extract token usage and cost information
             token_usage = {}
             cost_info = {}
             
-            # Debug the entire result structure to find token usage
-            logger.debug(f"Result type: {type(result)}")
-            logger.debug(f"Result attributes: {dir(result)}")
-            
-            # Check if trace is available (OpenAI Agents SDK specific)
-            if hasattr(result, 'trace'):
-                logger.debug("Found trace attribute in result")
-                try:
-                    if hasattr(result.trace, 'usage'):
-                        logger.debug(f"Usage found in trace: {result.trace.usage}")
-                        usage_data = result.trace.usage
-                        # Extract token usage
-                        if isinstance(usage_data, dict):
-                            token_usage = {
-                                'prompt_tokens': usage_data.get('prompt_tokens', 0),
-                                'completion_tokens': usage_data.get('completion_tokens', 0),
-                                'total_tokens': usage_data.get('total_tokens', 0)
-                            }
-                        else:
-                            token_usage = {
-                                'prompt_tokens': getattr(usage_data, 'prompt_tokens', 0),
-                                'completion_tokens': getattr(usage_data, 'completion_tokens', 0),
-                                'total_tokens': getattr(usage_data, 'total_tokens', 0)
-                            }
-                        
-                        # Calculate cost
-                        prompt_cost_per_1k = 0.01  # $0.01 per 1K tokens for GPT-4 input
-                        completion_cost_per_1k = 0.03  # $0.03 per 1K tokens for GPT-4 output
-                        
-                        prompt_tokens = token_usage.get('prompt_tokens', 0)
-                        completion_tokens = token_usage.get('completion_tokens', 0)
-                        
-                        prompt_cost = (prompt_tokens / 1000) * prompt_cost_per_1k
-                        completion_cost = (completion_tokens / 1000) * completion_cost_per_1k
-                        total_cost = prompt_cost + completion_cost
-                        
-                        cost_info = {
-                            'prompt_cost': round(prompt_cost, 6),
-                            'completion_cost': round(completion_cost, 6),
-                            'total_cost': round(total_cost, 6)
-                        }
-                    # If no usage directly in trace, try looking through trace items
-                    elif hasattr(result.trace, 'trace_items'):
-                        for item in result.trace.trace_items:
-                            if hasattr(item, 'usage') and item.usage:
-                                logger.debug(f"Found usage in trace item: {item.usage}")
-                                usage_data = item.usage
-                                token_usage = {
-                                    'prompt_tokens': getattr(usage_data, 'prompt_tokens', 0) if hasattr(usage_data, 'prompt_tokens') else usage_data.get('prompt_tokens', 0),
-                                    'completion_tokens': getattr(usage_data, 'completion_tokens', 0) if hasattr(usage_data, 'completion_tokens') else usage_data.get('completion_tokens', 0),
-                                    'total_tokens': getattr(usage_data, 'total_tokens', 0) if hasattr(usage_data, 'total_tokens') else usage_data.get('total_tokens', 0)
-                                }
-                                
-                                # Calculate cost
-                                prompt_cost_per_1k = 0.01
-                                completion_cost_per_1k = 0.03
-                                
-                                prompt_tokens = token_usage.get('prompt_tokens', 0)
-                                completion_tokens = token_usage.get('completion_tokens', 0)
-                                
-                                prompt_cost = (prompt_tokens / 1000) * prompt_cost_per_1k
-                                completion_cost = (completion_tokens / 1000) * completion_cost_per_1k
-                                total_cost = prompt_cost + completion_cost
-                                
-                                cost_info = {
-                                    'prompt_cost': round(prompt_cost, 6),
-                                    'completion_cost': round(completion_cost, 6),
-                                    'total_cost': round(total_cost, 6)
-                                }
-                                break
-                except Exception as e:
-                    logger.debug(f"Error accessing usage from trace: {str(e)}")
+            # Debug the entire result structure to find token usage; the messages
+            # are only built when debug logging is on, since dir() is not free
+            if logger.DEBUG:
+                logger.debug(f"Result type: {type(result)}")
+                logger.debug(f"Result attributes: {dir(result)}")
             
-            # Try other methods to access usage data if trace approach didn't work
-            if not token_usage:
-                # Try to access usage information directly from the result object
-                try:
-                    # In some versions of the OpenAI API, usage is available in the choices array
-                    if hasattr(result, 'usage'):
-                        logger.debug(f"Found usage directly in result: {result.usage}")
-                        if isinstance(result.usage, dict):
-                            token_usage = {
-                                'prompt_tokens': result.usage.get('prompt_tokens', 0),
-                                'completion_tokens': result.usage.get('completion_tokens', 0),
-                                'total_tokens': result.usage.get('total_tokens', 0)
-                            }
-                        else:
-                            token_usage = {
-                                'prompt_tokens': getattr(result.usage, 'prompt_tokens', 0),
-                                'completion_tokens': getattr(result.usage, 'completion_tokens', 0),
-                                'total_tokens': getattr(result.usage, 'total_tokens', 0)
-                            }
-                        
-                        # Calculate cost based on token usage
-                        prompt_cost_per_1k = 0.01  # $0.01 per 1K tokens for GPT-4 input
-                        completion_cost_per_1k = 0.03  # $0.03 per 1K tokens for GPT-4 output
-                        
-                        prompt_tokens = token_usage.get('prompt_tokens', 0)
-                        completion_tokens = token_usage.get('completion_tokens', 0)
-                        
-                        prompt_cost = (prompt_tokens / 1000) * prompt_cost_per_1k
-                        completion_cost = (completion_tokens / 1000) * completion_cost_per_1k
-                        total_cost = prompt_cost + completion_cost
-                        
-                        cost_info = {
-                            'prompt_cost': round(prompt_cost, 6),
-                            'completion_cost': round(completion_cost, 6),
-                            'total_cost': round(total_cost, 6)
-                        }
-                except Exception as e:
-                    logger.debug(f"Error accessing usage from result: {str(e)}")
-            
-            # Try to access OpenAI specific data from the run property if previous approaches didn't work
-            if not token_usage and hasattr(result, 'run'):
-                try:
-                    # In OpenAI Agents SDK, token usage might be in the run.usage property
-                    if hasattr(result.run, 'usage') and result.run.usage:
-                        logger.debug(f"Usage found in run: {result.run.usage}")
-                        # Check if it's a dictionary or an object
-                        if isinstance(result.run.usage, dict):
-                            token_usage = {
-                                'prompt_tokens': result.run.usage.get('prompt_tokens', 0),
-                                'completion_tokens': result.run.usage.get('completion_tokens', 0),
-                                'total_tokens': result.run.usage.get('total_tokens', 0)
-                            }
-                        else:
-                            # Assume it's an object with attributes
-                            token_usage = {
-                                'prompt_tokens': getattr(result.run.usage, 'prompt_tokens', 0),
-                                'completion_tokens': getattr(result.run.usage, 'completion_tokens', 0),
-                                'total_tokens': getattr(result.run.usage, 'total_tokens', 0)
-                            }
-                        
-                        # Calculate cost
-                        prompt_cost_per_1k = 0.01  # $0.01 per 1K tokens for GPT-4 input
-                        completion_cost_per_1k = 0.03  # $0.03 per 1K tokens for GPT-4 output
-                        
-                        prompt_tokens = token_usage.get('prompt_tokens', 0)
-                        completion_tokens = token_usage.get('completion_tokens', 0)
-                        
-                        prompt_cost = (prompt_tokens / 1000) * prompt_cost_per_1k
-                        completion_cost = (completion_tokens / 1000) * completion_cost_per_1k
-                        total_cost = prompt_cost + completion_cost
-                        
-                        cost_info = {
-                            'prompt_cost': round(prompt_cost, 6),
-                            'completion_cost': round(completion_cost, 6),
-                            'total_cost': round(total_cost, 6)
-                        }
-                except Exception as e:
-                    logger.debug(f"Error accessing usage from run: {str(e)}")
-            
-            # If we still don't have token usage, check for a response object that might have it
-            if not token_usage and hasattr(result, 'response'):
-                try:
-                    if hasattr(result.response, 'usage'):
-                        logger.debug(f"Usage found in response: {result.response.usage}")
-                        usage_data = result.response.usage
-                        token_usage = {
-                            'prompt_tokens': getattr(usage_data, 'prompt_tokens', 0) if hasattr(usage_data, 'prompt_tokens') else usage_data.get('prompt_tokens', 0),
-                            'completion_tokens': getattr(usage_data, 'completion_tokens', 0) if hasattr(usage_data, 'completion_tokens') else usage_data.get('completion_tokens', 0),
-                            'total_tokens': getattr(usage_data, 'total_tokens', 0) if hasattr(usage_data, 'total_tokens') else usage_data.get('total_tokens', 0)
-                        }
-                        
-                        # Calculate cost
-                        prompt_cost_per_1k = 0.01
-                        completion_cost_per_1k = 0.03
-                        
-                        prompt_tokens = token_usage.get('prompt_tokens', 0)
-                        completion_tokens = token_usage.get('completion_tokens', 0)
-                        
-                        prompt_cost = (prompt_tokens / 1000) * prompt_cost_per_1k
-                        completion_cost = (completion_tokens / 1000) * completion_cost_per_1k
-                        total_cost = prompt_cost + completion_cost
-                        
-                        cost_info = {
-                            'prompt_cost': round(prompt_cost, 6),
-                            'completion_cost': round(completion_cost, 6),
-                            'total_cost': round(total_cost, 6)
-                        }
-                except Exception as e:
-                    logger.debug(f"Error accessing usage from response: {str(e)}")
+            try:
+                usage_data = find_token_usage(result)
+                if usage_data is not None:
+                    if logger.DEBUG:
+                        logger.debug(f"Usage found: {usage_data}")
+                    token_usage = extract_token_usage(usage_data)
+                    cost_info = compute_cost(token_usage['prompt_tokens'], token_usage['completion_tokens'], model_name(agent))
+            except Exception as e:
+                logger.debug(f"Error accessing usage from result: {str(e)}")
             
             # If we still don't have token usage, attempt to estimate from input and output lengths
             if not token_usage:
                 try:
                     input_length = len(user_input)
-                    output_length = len(result.final_output) if hasattr(result, 'final_output') else 0
+                    output_length = len(final_output) if final_output is not None else 0
                     
                     # Very rough estimation: 1 token ≈ 4 characters
                     estimated_prompt_tokens = input_length // 4
@@ -326,25 +325,14 @@ class AgentExecutor:
                     }
                     
                     # Calculate estimated cost
-                    prompt_cost_per_1k = 0.01
-                    completion_cost_per_1k = 0.03
-                    
-                    prompt_cost = (estimated_prompt_tokens / 1000) * prompt_cost_per_1k
-                    completion_cost = (estimated_completion_tokens / 1000) * completion_cost_per_1k
-                    total_cost = prompt_cost + completion_cost
-                    
-                    cost_info = {
-                        'prompt_cost': round(prompt_cost, 6),
-                        'completion_cost': round(completion_cost, 6),
-                        'total_cost': round(total_cost, 6),
-                        'is_estimated': True  # Flag to indicate this is an estimation
-                    }
+                    cost_info = compute_cost(estimated_prompt_tokens, estimated_completion_tokens, model_name(agent))
+                    cost_info['is_estimated'] = True  # Flag to indicate this is an estimation
                 except Exception as e:
                     logger.debug(f"Error estimating token usage: {str(e)}")
                     logger.warning("Could not find or estimate token usage data")
             
             return {
-                "response": result.final_output,
+                "response": final_output,
                 "token_usage": token_usage,
                 "cost": cost_info
             }
@@ -355,7 +343,8 @@ class AgentExecutor:
             return {
                 "response": error_message,
                 "token_usage": {},
-                "cost": {}
+                "cost": {},
+                "error": error_message
             }
     
     async def cleanup(self):
@@ -368,6 +357,23 @@ class AgentExecutor:
 class OrchestratorExecutor:
     """Executes orchestrators with agents SDK"""
     
+    # Agents built by create_agent_from_data, keyed on a fingerprint of the agent
+    # data and user values, shared by all executors; oldest entries are evicted
+    # past AGENT_CACHE_SIZE
+    AGENT_CACHE_SIZE = 256
+    _agent_cache: "OrderedDict[str, Agent]" = OrderedDict()
+    
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Drop all cached agent instances"""
+        cls._agent_cache.clear()
+    
+    @staticmethod
+    def _agent_cache_key(agent_data: Dict[str, Any], user_values: Optional[Dict[str, Any]]) -> str:
+        """Fingerprint the inputs that determine the agent built from them"""
+        payload = orjson.dumps([agent_data, user_values or {}], option=orjson.OPT_SORT_KEYS, default=str)
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+    
     def __init__(self):
         """Initialize the orchestrator executor"""
         self.agent_executor = AgentExecutor()
@@ -384,13 +390,6 @@ class OrchestratorExecutor:
         Returns:
             Agent: The created agent instance
         """
-        # Get tools based on selected_tools names
-        tools = []
-        for tool_name in agent_data.get('selected_tools', []):
-            tool_def = get_tool_by_name(tool_name)
-            if tool_def and 'function' in tool_def:
-                tools.append(tool_def['function'])
-        
         # Get agent name for display in hooks
         agent_name = agent_data.get('name', 'Unnamed Agent')
         
@@ -422,49 +421,89 @@ class OrchestratorExecutor:
         else:
             logger.warning(f"No user values provided for agent {agent_name} prompts")
         
-        # Format system prompt with user values if provided
+        # Reuse the agent built for the same data and values, if any
+        cache_key = self._agent_cache_key(agent_data, user_values)
+        agent = self._agent_cache.get(cache_key)
+        if agent is not None:
+            self._agent_cache.move_to_end(cache_key)
+            return agent
+        
+        # Get tools based on selected_tools names
+        tools = get_tool_functions(agent_data.get('selected_tools', []))
+        
+        # Format system prompt with user values if provided; a prompt without
+        # braces has nothing to substitute or unescape, so it is used as is
         system_prompt = agent_data.get('system_prompt', '')
-        if user_values:
-            try:
-                system_prompt = system_prompt.format(**user_values)
-                logger.info(f"Formatted system prompt for {agent_name}")
-            except KeyError as e:
-                logger.warning(f"Missing key in user_values for formatting prompt: {str(e)}")
-                logger.warning(f"Available keys: {list(user_values.keys())}")
-                logger.warning(f"Required keys: {self.extract_placeholders(system_prompt)}")
+        if user_values and has_format_fields(system_prompt):
+            system_prompt = self.format_prompt(system_prompt, user_values, agent_name, "system prompt")
         
         # Create the agent with custom hooks
         agent = Agent(
             name=agent_name,
             instructions=system_prompt,
             tools=tools,
-            hooks=CustomAgentHooks(display_name=agent_name)
+            hooks=hooks_for(agent_name)
         )
         
         # Format and add additional prompt if it exists
         if 'additional_prompt' in agent_data and agent_data['additional_prompt']:
             additional_prompt = agent_data['additional_prompt']
-            if user_values:
-                try:
-                    additional_prompt = additional_prompt.format(**user_values)
-                    logger.info(f"Formatted additional prompt for {agent_name}")
-                except KeyError as e:
-                    logger.warning(f"Missing key in user_values for formatting additional prompt: {str(e)}")
-                    logger.warning(f"Available keys: {list(user_values.keys())}")
-                    logger.warning(f"Required keys: {self.extract_placeholders(additional_prompt)}")
+            if user_values and has_format_fields(additional_prompt):
+                additional_prompt = self.format_prompt(additional_prompt, user_values, agent_name, "additional prompt")
             agent.additional_prompt = additional_prompt
         
+        self._agent_cache[cache_key] = agent
+        if len(self._agent_cache) > self.AGENT_CACHE_SIZE:
+            self._agent_cache.popitem(last=False)
+        
         return agent
     
+    def format_prompt(self, text: str, user_values: Dict[str, Any], agent_name: str, label: str) -> str:
+        """
+        Format a prompt with user values, leaving it unformatted if a value is missing.
+        
+        Missing placeholders are found with a set difference up front, so the
+        common case of a partially filled form does not raise and catch a
+        KeyError; fields the placeholder pattern does not cover (e.g.
+        {name.attr}) still fall back to the KeyError check.
+        
+        Args:
+            text (str): Prompt template
+            user_values (Dict[str, Any]): User-provided values to format into the prompt
+            agent_name (str): Name of the agent, for logging
+            label (str): Name of the prompt, for logging
+            
+        Returns:
+            str: The formatted prompt, or the template if a value is missing
+        """
+        required_keys = set(PLACEHOLDER_PATTERN.findall(text))
+        missing_keys = required_keys.difference(user_values)
+        if missing_keys:
+            self._log_missing_key(repr(min(missing_keys)), user_values, required_keys, label)
+            return text
+        
+        try:
+            formatted = text.format(**user_values)
+        except KeyError as e:
+            self._log_missing_key(str(e), user_values, required_keys, label)
+            return text
+        logger.info(f"Formatted {label} for {agent_name}")
+        return formatted
+    
+    @staticmethod
+    def _log_missing_key(missing_key: str, user_values: Dict[str, Any], required_keys: Set[str], label: str) -> None:
+        """Log which user value a prompt template was missing"""
+        logger.warning(f"Missing key in user_values for formatting {label}: {missing_key}")
+        logger.warning(f"Available keys: {list(user_values.keys())}")
+        logger.warning(f"Required keys: {list(required_keys)}")
+    
     def extract_placeholders(self, text: str) -> List[str]:
         """Extract placeholder variables from text in {name} format"""
-        import re
         if not text:
             return []
         
         # Find all {placeholder} patterns
-        matches = re.findall(r'\{([a-zA-Z0-9_]+)\}', text)
-        return list(set(matches))
+        return list(set(PLACEHOLDER_PATTERN.findall(text)))
     
     async def run_orchestrator(self, orchestrator: Orchestrator, user_input: str, user_values: Dict[str, Any] = None) -> Dict[str, Any]:
         """
@@ -497,11 +536,10 @@ class OrchestratorExecutor:
         }
         
         try:
-            # Create all agent instances
+            # Create all agent instances from one snapshot of the agents store
             agents = []
+            agents_data = await asyncio.to_thread(load_agents)
             for agent_id in orchestrator.agents:
-                # Load agent data
-                agents_data = load_agents()
                 if agent_id not in agents_data:
                     error_msg = f"Agent {agent_id} not found in agents data"
                     logger.error(error_msg)
@@ -515,11 +553,17 @@ class OrchestratorExecutor:
                 agents.append((agent_id, agent))
                 
                 # Log debug info
-                if 'additional_prompt' in agent_data:
+                if logger.DEBUG and 'additional_prompt' in agent_data:
                     debug_msg = f"Agent {agent_id} loaded with additional prompt: {agent.additional_prompt}"
                     logger.debug(debug_msg)
                     
-            # Run all agents in sequence
+            # Running token and cost totals, kept up to date in the result after every agent
+            token_totals = result["token_usage"]
+            prompt_cost_total = completion_cost_total = 0
+            
+            # Run all agents in sequence. The calls cannot overlap: with handoff each
+            # agent takes the previous agent's response as its input, and without
+            # it the run stops after the first agent
             for i, (agent_id, agent) in enumerate(agents):
                 logger.info(f"Running agent {i+1}/{len(agents)}: {agent.name}")
                 
@@ -531,14 +575,20 @@ class OrchestratorExecutor:
                 agent_token_usage = agent_result.get("token_usage", {})
                 agent_cost = agent_result.get("cost", {})
                 
-                # Accumulate token usage and cost
-                result["token_usage"]["prompt_tokens"] += agent_token_usage.get("prompt_tokens", 0)
-                result["token_usage"]["completion_tokens"] += agent_token_usage.get("completion_tokens", 0)
-                result["token_usage"]["total_tokens"] += agent_token_usage.get("total_tokens", 0)
+                # Accumulate token usage
+                token_totals["prompt_tokens"] += agent_token_usage.get("prompt_tokens", 0)
+                token_totals["completion_tokens"] += agent_token_usage.get("completion_tokens", 0)
+                token_totals["total_tokens"] += agent_token_usage.get("total_tokens", 0)
                 
-                result["cost"]["prompt_cost"] += agent_cost.get("prompt_cost", 0)
-                result["cost"]["completion_cost"] += agent_cost.get("completion_cost", 0)
-                result["cost"]["total_cost"] += agent_cost.get("total_cost", 0)
+                # Sum costs as exact nano-dollar integers, at the rates of each agent's model
+                agent_prompt_cost, agent_completion_cost = token_cost(
+                    agent_token_usage.get("prompt_tokens", 0),
+                    agent_token_usage.get("completion_tokens", 0),
+                    model_name(agent)
+                )
+                prompt_cost_total += agent_prompt_cost
+                completion_cost_total += agent_completion_cost
+                result["cost"] = cost_in_dollars(prompt_cost_total, completion_cost_total)
                 
                 # Add to agent calls
                 result["agent_calls"].append({
@@ -553,9 +603,15 @@ class OrchestratorExecutor:
                 result["response"] = agent_response
                 
                 # Log results
-                logger.info(f"Agent {agent.name} responded: {agent_response[:100]}...")
-                logger.info(f"Token usage: {agent_token_usage}")
-                logger.info(f"Cost: {agent_cost}")
+                logger.info("Agent %s responded: %.100s...", agent.name, agent_response)
+                logger.info("Token usage: %s", agent_token_usage)
+                logger.info("Cost: %s", agent_cost)
+                
+                # A failed agent ends the run, rather than handing its error
+                # message to the next agent as input
+                if "error" in agent_result:
+                    result["execution_log"].append({"agent_id": agent_id, "error": agent_result["error"]})
+                    break
                 
                 # Stop if this is the last agent or if handoff is disabled
                 if i == len(agents) - 1 or not agent_data.get('handoff', False):
@@ -564,11 +620,6 @@ class OrchestratorExecutor:
                 # Otherwise, modify user input for next agent
                 user_input = agent_response
                 
-            # Round cost values for display
-            result["cost"]["prompt_cost"] = round(result["cost"]["prompt_cost"], 6)
-            result["cost"]["completion_cost"] = round(result["cost"]["completion_cost"], 6) 
-            result["cost"]["total_cost"] = round(result["cost"]["total_cost"], 6)
-                
             logger.info(f"Orchestrator completed. Total tokens: {result['token_usage']['total_tokens']}, Total cost: ${result['cost']['total_cost']}")
             
         except Exception as e:
@@ -580,6 +631,17 @@ class OrchestratorExecutor:
         return result
 
 
+@lru_cache(maxsize=1)
+def get_shared_orchestrator_executor() -> OrchestratorExecutor:
+    """Get the orchestrator executor shared by all runs, so its HTTP client and connection pool are reused"""
+    return OrchestratorExecutor()
+
+async def close_shared_orchestrator_executor() -> None:
+    """Close the shared orchestrator executor if it was created"""
+    if get_shared_orchestrator_executor.cache_info().currsize:
+        await get_shared_orchestrator_executor().agent_executor.cleanup()
+        get_shared_orchestrator_executor.cache_clear()
+
 # Helper function to run an orchestrator by ID
 async def run_orchestrator_by_id(orchestrator_id: str, user_input: str, user_values: Dict[str, Any] = None, save_history: bool = True) -> Dict[str, Any]:
     """
@@ -596,8 +658,8 @@ async def run_orchestrator_by_id(orchestrator_id: str, user_input: str, user_val
     """
     logger.info(f"Running orchestrator by ID: {orchestrator_id}")
     
-    # Load orchestrators
-    orchestrators_data = load_orchestrators()
+    # Load orchestrators off the event loop
+    orchestrators_data = await asyncio.to_thread(load_orchestrators)
     
     if orchestrator_id not in orchestrators_data:
         error_message = f"Orchestrator with ID {orchestrator_id} not found"
@@ -613,22 +675,16 @@ async def run_orchestrator_by_id(orchestrator_id: str, user_input: str, user_val
     orchestrator_data = orchestrators_data[orchestrator_id]
     orchestrator = Orchestrator.from_dict(orchestrator_data)
     
-    # Create executor
-    executor = OrchestratorExecutor()
+    # Run orchestrator on the shared executor, which stays open across runs
+    executor = get_shared_orchestrator_executor()
+    result = await executor.run_orchestrator(orchestrator, user_input, user_values)
     
-    # Run orchestrator
-    try:
-        result = await executor.run_orchestrator(orchestrator, user_input, user_values)
+    # Save to conversation history if required; the shared writer queues it,
+    # so the caller does not wait for the write
+    if save_history:
+        await history_writer.submit(orchestrator_id, user_input, result["response"], user_values)
         
-        # Save to conversation history if required
-        if save_history:
-            save_to_conversation_history(orchestrator_id, user_input, result["response"], user_values)
-            
-        return result
-    finally:
-        # Cleanup executor resources
-        await executor.agent_executor.cleanup()
-        logger.info("Executor resources cleaned up")
+    return result
 
 def load_conversation_history(orchestrator_id: str) -> List[Dict[str, Any]]:
     """
@@ -640,17 +696,7 @@ def load_conversation_history(orchestrator_id: str) -> List[Dict[str, Any]]:
     Returns:
         List[Dict[str, Any]]: Conversation history
     """
-    history_file = f"data/conversations/{orchestrator_id}.json"
-    
-    if os.path.exists(history_file):
-        try:
-            with open(history_file, "r") as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            logger.error(f"Error decoding conversation history file for orchestrator {orchestrator_id}")
-            return []
-    
-    return []
+    return load_conversation(orchestrator_id)
 
 def save_conversation_history(orchestrator_id: str, history: List[Dict[str, Any]]) -> None:
     """
@@ -660,10 +706,7 @@ def save_conversation_history(orchestrator_id: str, history: List[Dict[str, Any]
         orchestrator_id (str): ID of the orchestrator
         history (List[Dict[str, Any]]): Conversation history
     """
-    history_file = f"data/conversations/{orchestrator_id}.json"
-    
-    with open(history_file, "w") as f:
-        json.dump(history, f, indent=2)
+    write_conversation(orchestrator_id, history)
 
 def save_to_conversation_history(orchestrator_id: str, user_input: str, response: str, user_values: Optional[Dict[str, Any]] = None) -> None:
     """
@@ -675,25 +718,10 @@ def save_to_conversation_history(orchestrator_id: str, user_input: str, response
         response (str): Response from the orchestrator
         user_values (Dict[str, Any], optional): User-provided values used in the query
     """
-    # Load existing history
-    history = load_conversation_history(orchestrator_id)
-    
-    # Prepare the new entry
-    entry = {
-        "timestamp": datetime.datetime.now().isoformat(),
-        "user": user_input,
-        "response": response
-    }
-    
-    # Add user values if provided
-    if user_values:
-        entry["user_values"] = user_values
-    
-    # Add to history
-    history.append(entry)
-    
-    # Save updated history
-    save_conversation_history(orchestrator_id, history)
+    # Append to history without rewriting the earlier messages; large
+    # responses go to side files, and the summary and search postings are
+    # updated with it
+    append_conversation_messages(orchestrator_id, [build_history_entry(user_input, response, user_values)])
     logger.info(f"Added new exchange to conversation history for orchestrator {orchestrator_id}")
 
 def get_conversation_history(orchestrator_id: str) -> List[Dict[str, Any]]:
@@ -704,6 +732,6 @@ def get_conversation_history(orchestrator_id: str) -> List[Dict[str, Any]]:
         orchestrator_id (str): ID of the orchestrator
         
     Returns:
-        List[Dict[str, Any]]: Conversation history
+        List[Dict[str, Any]]: Conversation history, with offloaded responses in full
     """
-    return load_conversation_history(orchestrator_id)
+    return [resolve_response(orchestrator_id, message) for message in load_conversation_history(orchestrator_id)]
@@ -40,6 +40,24 @@ def get_clickhouse_client():
     
     return client
 
+# Async client shared by the tools, created on first use
+_async_client = None
+
+async def get_async_clickhouse_client():
+    """Get the shared async ClickHouse client, so tool calls can overlap without blocking the event loop"""
+    global _async_client
+    if _async_client is None:
+        _async_client = await clickhouse_connect.get_async_client(
+            host=os.environ.get("CLICKHOUSE_HOST", "localhost"),
+            port=int(os.environ.get("CLICKHOUSE_PORT", "8123")),
+            username=os.environ.get("CLICKHOUSE_USER", "default"),
+            password=os.environ.get("CLICKHOUSE_PASSWORD", ""),
+            database=os.environ.get("CLICKHOUSE_DATABASE", "default"),
+            # Concurrent queries cannot share a session
+            autogenerate_session_id=False
+        )
+    return _async_client
+
 # Function to check database connectivity
 def check_db_connectivity():
     """Check if ClickHouse database is reachable and connection settings are correct"""
@@ -78,7 +96,8 @@ def setup_ssl_bypass():
     # Create a custom transport with SSL verification disabled
     transport = httpx.AsyncHTTPTransport(
         verify=False,  # Disable SSL verification
-        http2=True     # Enable HTTP/2 for better performance
+        http2=False,   # Each call uses one or two streams; pooled HTTP/1.1 connections suffice
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=60.0)
     )
     
     # Create httpx client with the custom transport
@@ -159,14 +178,14 @@ def multiply_by_two(x: int) -> int:
 
 # ClickHouse database tools
 @function_tool
-def show_databases() -> List[str]:
+async def show_databases() -> List[str]:
     """
     Show all databases in the ClickHouse server.
     Returns a list of database names.
     """
     try:
-        client = get_clickhouse_client()
-        result = client.query("SHOW DATABASES")
+        client = await get_async_clickhouse_client()
+        result = await client.query("SHOW DATABASES")
         databases = [row[0] for row in result.result_rows]
         return databases
     except Exception as e:
@@ -174,18 +193,18 @@ def show_databases() -> List[str]:
 
 
 @function_tool
-def show_tables(database: str = None) -> List[str]:
+async def show_tables(database: str = None) -> List[str]:
     """
     Show all tables in the specified ClickHouse database.
     If no database is specified, uses the default database from connection.
     Returns a list of table names.
     """
     try:
-        client = get_clickhouse_client()
+        client = await get_async_clickhouse_client()
         if database:
-            result = client.query(f"SHOW TABLES FROM {database}")
+            result = await client.query(f"SHOW TABLES FROM {database}")
         else:
-            result = client.query("SHOW TABLES")
+            result = await client.query("SHOW TABLES")
         tables = [row[0] for row in result.result_rows]
         return tables
     except Exception as e:
@@ -193,20 +212,20 @@ def show_tables(database: str = None) -> List[str]:
 
 
 @function_tool
-def describe_table(table: str, database: str = None) -> List[Dict[str, str]]:
+async def describe_table(table: str, database: str = None) -> List[Dict[str, str]]:
     """
     Describe the structure of a specified table.
     If no database is specified, uses the default database from connection.
     Returns the table structure with column names and types.
     """
     try:
-        client = get_clickhouse_client()
+        client = await get_async_clickhouse_client()
         if database:
             query = f"DESCRIBE TABLE {database}.{table}"
         else:
             query = f"DESCRIBE TABLE {table}"
         
-        result = client.query(query)
+        result = await client.query(query)
         
         # Convert to a list of dictionaries for better readability
         columns = []
@@ -224,27 +243,18 @@ def describe_table(table: str, database: str = None) -> List[Dict[str, str]]:
 
 
 @function_tool
-def run_query(query: str) -> List[Dict]:
+async def run_query(query: str) -> List[Dict]:
     """
     Run a custom SQL query on ClickHouse.
     Returns the query results as a list of dictionaries.
     Use with caution, as this allows arbitrary SQL execution.
     """
     try:
-        client = get_clickhouse_client()
-        result = client.query(query)
+        client = await get_async_clickhouse_client()
+        result = await client.query(query)
         
         # Convert to list of dictionaries for better readability
-        rows = []
-        column_names = [col[0] for col in result.column_names]
-        
-        for row in result.result_rows:
-            row_dict = {}
-            for i, col_name in enumerate(column_names):
-                row_dict[col_name] = row[i]
-            rows.append(row_dict)
-        
-        return rows
+        return list(result.named_results())
     except Exception as e:
         return f"Error: {str(e)}"
 
@@ -1,11 +1,32 @@
 from typing import List, Dict, Any
+import functools
 import pandas as pd
 import numpy as np
 from agents import Agent, function_tool
 
 from src.utils.agent_hooks import CustomAgentHooks
+from src.utils.tool_utils import memoize_tool_result
+
+# Maximum number of memoized results per analysis tool; the data is part of
+# the key, so entries never go stale and need no expiry
+ANALYSIS_CACHE_SIZE = 256
+
+def _has_column(data: List[Dict], column_name: str) -> bool:
+    """Whether any row has the column"""
+    return any(column_name in row for row in data)
+
+def _numeric_column(data: List[Dict], column_name: str) -> np.ndarray:
+    """
+    Extract one column of row data as float64, with missing or non-numeric values as NaN.
+    
+    Only the requested column is converted, rather than boxing every value
+    of every row into a full DataFrame.
+    """
+    column = pd.Series([row.get(column_name) for row in data], dtype=object)
+    return pd.to_numeric(column, errors='coerce').to_numpy(dtype=np.float64)
 
 @function_tool
+@memoize_tool_result(maxsize=ANALYSIS_CACHE_SIZE)
 def find_outliers(data: List[Dict], column_name: str, method: str, threshold: float) -> List[Dict]:
     """
     Finds outliers in the specified column using the chosen method.
@@ -20,45 +41,45 @@ def find_outliers(data: List[Dict], column_name: str, method: str, threshold: fl
         A list of dictionaries containing the outliers
     """
     try:
-        # Convert to pandas DataFrame
-        df = pd.DataFrame(data)
-        
         # Check if column exists
-        if column_name not in df.columns:
+        if not _has_column(data, column_name):
             return f"Error: Column '{column_name}' not found in data"
         
-        # Extract numeric data
-        numeric_data = pd.to_numeric(df[column_name], errors='coerce')
-        df[column_name] = numeric_data
+        # Extract only the column being checked as a float array, so the
+        # statistics below run as NumPy reductions over contiguous values
+        values = _numeric_column(data, column_name)
         
-        # Remove nulls
-        df_clean = df.dropna(subset=[column_name])
+        # Drop nulls once up front, rather than having every nan-aware
+        # reduction build its own masked copy
+        valid = values[~np.isnan(values)]
+        if valid.size == 0:
+            return []
         
-        # Identify outliers
-        outliers = None
+        # Identify outliers; NaN comparisons are False, so nulls are never flagged
+        mask = None
         
         if method.lower() == "z_score":
-            # Z-score method
-            z_scores = np.abs((numeric_data - numeric_data.mean()) / numeric_data.std())
-            outliers = df[z_scores > threshold]
+            # Z-score method (sample standard deviation, as pandas computes it)
+            mean = valid.mean()
+            std = valid.std(ddof=1)
+            mask = np.abs(values - mean) > threshold * std
         elif method.lower() == "iqr":
             # IQR method
-            Q1 = numeric_data.quantile(0.25)
-            Q3 = numeric_data.quantile(0.75)
+            Q1, Q3 = np.quantile(valid, [0.25, 0.75])
             IQR = Q3 - Q1
-            outliers = df[(numeric_data < (Q1 - threshold * IQR)) | (numeric_data > (Q3 + threshold * IQR))]
+            mask = (values < (Q1 - threshold * IQR)) | (values > (Q3 + threshold * IQR))
         else:
             return f"Error: Method '{method}' not supported. Use 'z_score' or 'iqr'."
         
-        # Return outliers as list of dictionaries
-        if outliers is not None and not outliers.empty:
-            return outliers.to_dict('records')
-        else:
-            return []
+        # Return the outlier rows, with the checked column as its numeric value;
+        # tolist() converts the positions and values to Python scalars in one go
+        positions = np.flatnonzero(mask).tolist()
+        return [{**data[i], column_name: value} for i, value in zip(positions, values[mask].tolist())]
     except Exception as e:
         return f"Error: {str(e)}"
 
 @function_tool
+@memoize_tool_result(maxsize=ANALYSIS_CACHE_SIZE)
 def find_correlation(data: List[Dict], column1: str, column2: str) -> Dict[str, Any]:
     """
     Calculates the correlation between two columns in the data.
@@ -72,27 +93,22 @@ def find_correlation(data: List[Dict], column1: str, column2: str) -> Dict[str,
         Dictionary with correlation coefficient and interpretation
     """
     try:
-        # Convert to pandas DataFrame
-        df = pd.DataFrame(data)
-        
         # Check if columns exist
-        if column1 not in df.columns:
+        if not _has_column(data, column1):
             return f"Error: Column '{column1}' not found in data"
-        if column2 not in df.columns:
+        if not _has_column(data, column2):
             return f"Error: Column '{column2}' not found in data"
         
-        # Convert to numeric
-        df[column1] = pd.to_numeric(df[column1], errors='coerce')
-        df[column2] = pd.to_numeric(df[column2], errors='coerce')
-        
-        # Remove rows with NaN values
-        df_clean = df.dropna(subset=[column1, column2])
+        # Extract both columns and keep the rows where both are numeric
+        values1 = _numeric_column(data, column1)
+        values2 = _numeric_column(data, column2)
+        valid = ~(np.isnan(values1) | np.isnan(values2))
         
-        if df_clean.empty:
+        if not valid.any():
             return {"error": "No valid numeric data found in the specified columns"}
         
         # Calculate correlation
-        corr = df_clean[column1].corr(df_clean[column2])
+        corr = float(np.corrcoef(values1[valid], values2[valid])[0, 1])
         
         # Interpret correlation
         if abs(corr) < 0.3:
@@ -118,6 +134,7 @@ def find_correlation(data: List[Dict], column1: str, column2: str) -> Dict[str,
     except Exception as e:
         return f"Error: {str(e)}"
 
+@functools.lru_cache(maxsize=None)
 def create_analyst_agent():
     """
     Creates and returns the data analyst agent
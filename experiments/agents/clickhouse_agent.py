@@ -1,7 +1,8 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from agents import Agent, function_tool
 import logging
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 
 from src.utils.agent_hooks import CustomAgentHooks
@@ -219,13 +220,17 @@ def run_query(query: str, database: str = None) -> List[Dict]:
         return f"Error: {str(e)}"
 
 
-def create_clickhouse_agent(database: str = None, tables: List[str] = None):
+@lru_cache(maxsize=None)
+def create_clickhouse_agent(database: str = None, tables: Tuple[str, ...] = None):
     """
     Creates and returns the ClickHouse agent
     
+    Agents are cached per arguments, so tables must be hashable: pass a
+    tuple or a comma-separated string rather than a list.
+    
     Args:
         database (str, optional): Name of the ClickHouse database
-        tables (List[str], optional): List of tables to query
+        tables (Tuple[str, ...], optional): Tables to query
     """
     # Log the agent creation parameters
     logger.info("="*60)
@@ -246,7 +251,7 @@ def create_clickhouse_agent(database: str = None, tables: List[str] = None):
             tables_list = [t.strip() for t in tables.split(",")]
             logger.info(f"Converting tables string to list: {tables_list}")
             tables_str = ", ".join(tables_list)
-        elif isinstance(tables, list):
+        elif isinstance(tables, (list, tuple)):
             tables_str = ", ".join(tables)
             logger.info(f"Using tables list: {tables}")
         else:
@@ -3,14 +3,16 @@ from agents.enhanced_tools import enhanced_clickhouse_query
 from utils.agent_hooks import CustomAgentHooks
 from agents.clickhouse_agent import create_clickhouse_agent
 from agents.user_input_agent import create_user_input_agent
+from functools import lru_cache
 
+@lru_cache(maxsize=None)
 def create_enhanced_orchestrator_agent():
     """
     Creates and returns an enhanced orchestrator agent that modifies user input
     when delegating to other agents
     """
     # Create the agents that will be used as tools
-    clickhouse_agent = create_clickhouse_agent(database="user_cohort_v2", tables=["monthly_seller_atg_brand"])
+    clickhouse_agent = create_clickhouse_agent(database="user_cohort_v2", tables=("monthly_seller_atg_brand",))
     user_input_agent = create_user_input_agent()
     
     # Create the orchestrator agent
@@ -24,31 +24,20 @@ def enhanced_clickhouse_query(
     Returns:
         Enhanced query string with context metadata that can be passed to ClickHouse agent
     """
-    # Start with the original query
-    enhanced_query = user_query
-    
     # Construct a metadata section with structured information
-    metadata = {}
-    
-    if table_name:
-        metadata["table"] = table_name
-    
-    if database:
-        metadata["database"] = database
-    
-    if limit:
-        metadata["limit"] = limit
-    
+    metadata = {
+        key: value
+        for key, value in (("table", table_name), ("database", database), ("limit", limit))
+        if value
+    }
     if additional_context:
         metadata.update(additional_context)
     
     # Only add metadata section if we have metadata
-    if metadata:
-        # Format the metadata as a string
-        metadata_str = ", ".join([f"{k}: '{v}'" for k, v in metadata.items()])
-        enhanced_query = f"{enhanced_query}\n\nContext: {{{metadata_str}}}"
-    
-    return enhanced_query
+    if not metadata:
+        return user_query
+    metadata_str = ", ".join(f"{k}: '{v}'" for k, v in metadata.items())
+    return f"{user_query}\n\nContext: {{{metadata_str}}}"
 
 
 # Example usage in the orchestrator agent
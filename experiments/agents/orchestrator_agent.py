@@ -4,13 +4,15 @@ from experiments.agents.clickhouse_agent import create_clickhouse_agent
 from experiments.agents.user_input_agent import create_user_input_agent
 from experiments.agents.analyst_agent import create_analyst_agent
 from experiments.agents.visualization_agent import create_visualization_agent
+from functools import lru_cache
 
+@lru_cache(maxsize=None)
 def create_orchestrator_agent():
     """
     Creates and returns the orchestrator agent that coordinates between the ClickHouse and User Input agents
     """
     # Create the agents that will be used as tools
-    clickhouse_agent = create_clickhouse_agent(database="user_cohort_v2", tables=["monthly_seller_atg_brand"])
+    clickhouse_agent = create_clickhouse_agent(database="user_cohort_v2", tables=("monthly_seller_atg_brand",))
     # analyst_agent = create_analyst_agent()
     visualization_agent = create_visualization_agent()
     
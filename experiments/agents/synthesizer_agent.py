@@ -1,6 +1,8 @@
 from agents import Agent
 from src.utils.agent_hooks import CustomAgentHooks
+from functools import lru_cache
 
+@lru_cache(maxsize=None)
 def create_synthesizer_agent():
     """
     Creates and returns a synthesizer agent that combines results from other agents
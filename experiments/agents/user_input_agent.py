@@ -1,5 +1,6 @@
 from agents import Agent, function_tool
 from utils.agent_hooks import CustomAgentHooks
+from functools import lru_cache
 
 @function_tool
 def get_user_input(prompt: str) -> str:
@@ -8,6 +9,7 @@ def get_user_input(prompt: str) -> str:
     """
     return input(prompt)
 
+@lru_cache(maxsize=None)
 def create_user_input_agent():
     """
     Creates and returns the user input agent
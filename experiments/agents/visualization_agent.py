@@ -1,19 +1,66 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
+from functools import lru_cache
+import uuid
 from agents import Agent, function_tool
 import os
-import pandas as pd
-import json
+import orjson
 
 from src.utils.agent_hooks import CustomAgentHooks
+from src.utils.tool_utils import memoize_tool_result
 from src.utils.visualization_utils import (
     generate_html_plot, 
     save_html_plot,
     is_time_series,
     is_plottable,
-    determine_chart_type
+    determine_chart_type,
+    describe_frame
 )
 
+# Maximum number of registered datasets kept in memory
+DATA_CACHE_SIZE = 32
+
+# Datasets registered in this process, by handle. Tools accept a handle in
+# place of inline rows, so a large result set is not serialized into the
+# prompt and reparsed for every tool call.
+_data_cache: "OrderedDict[str, List[Dict]]" = OrderedDict()
+
+def register_data(data: List[Dict]) -> str:
+    """
+    Keep a dataset in memory so tools can be called with a handle to it.
+
+    Args:
+        data (List[Dict]): Rows of the dataset
+
+    Returns:
+        str: Handle to pass as {"handle": ...} in a tool's data_input
+    """
+    handle = uuid.uuid4().hex
+    _data_cache[handle] = data
+    if len(_data_cache) > DATA_CACHE_SIZE:
+        _data_cache.popitem(last=False)
+    return handle
+
+def _parse_data_input(data_input: str) -> Tuple[Optional[Dict[str, Any]], List[Dict]]:
+    """
+    Parse a tool's JSON input and resolve its rows, inline or by handle.
+
+    Returns:
+        Tuple[Optional[Dict[str, Any]], List[Dict]]: The parsed input, or None
+        if it is not valid JSON, and its rows
+    """
+    try:
+        input_dict = orjson.loads(data_input)
+    except (orjson.JSONDecodeError, TypeError):
+        return None, []
+
+    handle = input_dict.get("handle")
+    if handle is not None:
+        return input_dict, _data_cache.get(handle, [])
+    return input_dict, input_dict.get("data", [])
+
 @function_tool
+@memoize_tool_result()
 def visualize_data(data_input: str) -> str:
     """
     Visualizes the data and returns the HTML content.
@@ -22,6 +69,7 @@ def visualize_data(data_input: str) -> str:
         data_input: JSON string with the following structure:
             {
                 "data": List of dictionaries containing the data,
+                "handle": (Optional) Handle of registered data, used instead of "data",
                 "title": (Optional) Title of the chart
             }
         
@@ -29,12 +77,10 @@ def visualize_data(data_input: str) -> str:
         str: HTML content with the visualization
     """
     # Parse input JSON
-    try:
-        input_dict = json.loads(data_input)
-        data = input_dict.get("data", [])
-        title = input_dict.get("title")
-    except (json.JSONDecodeError, TypeError):
+    input_dict, data = _parse_data_input(data_input)
+    if input_dict is None:
         return "Invalid input format. Please provide a valid JSON string."
+    title = input_dict.get("title")
     
     if not data:
         return "No data to visualize"
@@ -43,12 +89,16 @@ def visualize_data(data_input: str) -> str:
     if not title:
         title = "ClickHouse Data Visualization"
     
+    # Build the DataFrame once for the checks and the plot
+    import pandas as pd
+    df = pd.DataFrame(data)
+    
     # Check if data is plottable
-    if not is_plottable(data):
+    if not is_plottable(df):
         return "The data cannot be visualized as a chart because it doesn't contain numeric columns"
     
     # Generate the HTML for the plot
-    html_content = generate_html_plot(data, title)
+    html_content = generate_html_plot(df, title)
     
     return html_content
 
@@ -61,6 +111,7 @@ def save_visualization(data_input: str) -> str:
         data_input: JSON string with the following structure:
             {
                 "data": List of dictionaries containing the data,
+                "handle": (Optional) Handle of registered data, used instead of "data",
                 "filename": (Optional) Name of the file to save (without extension),
                 "title": (Optional) Title of the chart
             }
@@ -69,13 +120,11 @@ def save_visualization(data_input: str) -> str:
         str: Path to the saved HTML file
     """
     # Parse input JSON
-    try:
-        input_dict = json.loads(data_input)
-        data = input_dict.get("data", [])
-        filename = input_dict.get("filename", "clickhouse_visualization")
-        title = input_dict.get("title")
-    except (json.JSONDecodeError, TypeError):
+    input_dict, data = _parse_data_input(data_input)
+    if input_dict is None:
         return "Invalid input format. Please provide a valid JSON string."
+    filename = input_dict.get("filename", "clickhouse_visualization")
+    title = input_dict.get("title")
     
     if not data:
         return "No data to visualize"
@@ -84,16 +133,21 @@ def save_visualization(data_input: str) -> str:
     if not title:
         title = "ClickHouse Data Visualization"
     
+    # Build the DataFrame once for the checks and the plot
+    import pandas as pd
+    df = pd.DataFrame(data)
+    
     # Check if data is plottable
-    if not is_plottable(data):
+    if not is_plottable(df):
         return "The data cannot be visualized as a chart because it doesn't contain numeric columns"
     
     # Save the visualization to an HTML file
-    file_path = save_html_plot(data, filename, title)
+    file_path = save_html_plot(df, filename, title)
     
     return f"Visualization saved to: {file_path}"
 
 @function_tool
+@memoize_tool_result()
 def analyze_data_for_visualization(data_input: str) -> Dict[str, Any]:
     """
     Analyzes the data to determine the best visualization approach.
@@ -101,39 +155,32 @@ def analyze_data_for_visualization(data_input: str) -> Dict[str, Any]:
     Args:
         data_input: JSON string with the following structure:
             {
-                "data": List of dictionaries containing the data
+                "data": List of dictionaries containing the data,
+                "handle": (Optional) Handle of registered data, used instead of "data"
             }
         
     Returns:
         Dict: Analysis of the data for visualization purposes
     """
     # Parse input JSON
-    try:
-        input_dict = json.loads(data_input)
-        data = input_dict.get("data", [])
-    except (json.JSONDecodeError, TypeError):
+    input_dict, data = _parse_data_input(data_input)
+    if input_dict is None:
         return {"plottable": False, "reason": "Invalid input format. Please provide a valid JSON string."}
     
     if not data:
         return {"plottable": False, "reason": "No data provided"}
     
     # Convert to DataFrame for analysis
+    import pandas as pd
     df = pd.DataFrame(data)
     
-    # Check if data is plottable
-    plottable = is_plottable(data)
-    
-    # Check if it's time series
-    is_ts, time_col = is_time_series(data)
-    
-    # Get best chart type
-    chart_type = determine_chart_type(data)
-    
-    # Get numeric columns
-    numeric_columns = df.select_dtypes(include=['number', 'float', 'int']).columns.tolist()
-    
-    # Get categorical columns
-    categorical_columns = df.select_dtypes(include=['object']).columns.tolist()
+    # Column roles, time series detection and chart type, derived once
+    description = describe_frame(df)
+    plottable = description["plottable"]
+    is_ts, time_col = description["is_time_series"], description["time_column"]
+    chart_type = description["chart_type"]
+    numeric_columns = description["numeric_columns"]
+    categorical_columns = description["categorical_columns"]
     
     # Get dataset size
     row_count = len(df)
@@ -163,6 +210,7 @@ def analyze_data_for_visualization(data_input: str) -> Dict[str, Any]:
         "recommendations": recommendations
     }
 
+@lru_cache(maxsize=None)
 def create_visualization_agent():
     """
     Creates and returns the visualization agent
@@ -181,6 +229,7 @@ def create_visualization_agent():
         - analyze_data_for_visualization: Expects JSON with "data" key containing an array of data objects
         - visualize_data: Expects JSON with "data" key (required) and optional "title" key
         - save_visualization: Expects JSON with "data" key (required), optional "filename" and "title" keys
+        Instead of "data", any tool accepts a "handle" key naming data registered earlier; pass it through unchanged.
         
         Example usage:
         analyze_data_for_visualization('{"data": [{"col1": 1, "col2": "a"}, {"col1": 2, "col2": "b"}]}')
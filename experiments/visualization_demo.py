@@ -1,18 +1,33 @@
+import argparse
 import asyncio
 import os
-import json
+from typing import Optional
+import orjson
 from dotenv import load_dotenv
 
 from agents import Runner, RunConfig
 from src.utils.clickhouse_utils import check_db_connectivity
 from experiments.agents import create_clickhouse_agent, create_visualization_agent
+from experiments.agents.visualization_agent import register_data
 
 # Load environment variables from .env file
 load_dotenv()
 
-async def run_visualization_demo():
+def save_visualization_input(handle: str, filename: str, title: str) -> str:
+    """Format the save_visualization call for registered data"""
+    return orjson.dumps({
+        "handle": handle,
+        "filename": filename,
+        "title": title
+    }).decode()
+
+async def run_visualization_demo(filename: Optional[str] = None, title: Optional[str] = None):
     """
     Demonstrates the visualization capabilities for ClickHouse data
+    
+    Args:
+        filename: (Optional) File name to save the visualization to, instead of asking
+        title: (Optional) Title of the chart, instead of asking
     """
     try:
         print("🔍 ClickHouse Data Visualization Demo 🔍")
@@ -28,7 +43,7 @@ async def run_visualization_demo():
         user_query = input("\n🤔 Enter an SQL query to retrieve data from ClickHouse that you'd like to visualize: ")
         
         # Create agents
-        clickhouse_agent = create_clickhouse_agent(database="user_cohort_v2", tables=["monthly_seller_atg_brand"])
+        clickhouse_agent = create_clickhouse_agent(database="user_cohort_v2", tables=("monthly_seller_atg_brand",))
         visualization_agent = create_visualization_agent()
         
         # Step 1: Get data from ClickHouse
@@ -53,20 +68,39 @@ async def run_visualization_demo():
         # Step 2: Analyze data for visualization
         print("\n🔍 Analyzing data for visualization possibilities...\n")
         
+        # Register the rows once and pass the tools a handle, rather than
+        # serializing every row into each prompt
+        handle = register_data(data)
+        
         # Properly format the analyze call to use a properly formatted JSON object
-        analysis_input = json.dumps({"data": data})
-        analysis_result = await Runner.run(
+        analysis_input = orjson.dumps({"handle": handle}).decode()
+        analysis_task = asyncio.create_task(Runner.run(
             visualization_agent,
             f"analyze_data_for_visualization({analysis_input})",
             run_config=RunConfig(
                 tracing_disabled=False
             )
-        )
-        
+        ))
+        
+        # With the filename and title given up front the save does not depend
+        # on the analysis, so both agent runs go out at once
+        save_task = None
+        if filename and title:
+            save_task = asyncio.create_task(Runner.run(
+                visualization_agent,
+                f"save_visualization({save_visualization_input(handle, filename, title)})",
+                run_config=RunConfig(
+                    tracing_disabled=False
+                )
+            ))
+        
+        analysis_result = await analysis_task
         analysis = analysis_result.final_output
         
         # Check if data is plottable
         if not analysis.get("plottable", False):
+            if save_task is not None:
+                save_task.cancel()
             print(f"\n❌ This data cannot be plotted: {analysis.get('reason', 'No numeric columns')}")
             return
         
@@ -97,34 +131,32 @@ async def run_visualization_demo():
             if numeric_cols and time_col:
                 default_filename = f"{time_col}_vs_{numeric_cols[0]}"
         
-        # Ask for filename
-        filename = input(f"\n📁 Enter filename for the visualization (default: {default_filename}): ")
-        if not filename:
-            filename = default_filename
-        
-        # Ask for title
-        default_title = f"ClickHouse Data Visualization - {chart_type.capitalize()} Chart"
-        title = input(f"\n📝 Enter title for the visualization (default: {default_title}): ")
-        if not title:
-            title = default_title
-        
-        # Step 4: Save visualization
-        print("\n💾 Saving visualization...\n")
-        
-        # Format the save call with proper JSON
-        save_input = json.dumps({
-            "data": data,
-            "filename": filename,
-            "title": title
-        })
+        if save_task is None:
+            # Ask for filename
+            if not filename:
+                filename = input(f"\n📁 Enter filename for the visualization (default: {default_filename}): ")
+                if not filename:
+                    filename = default_filename
+            
+            # Ask for title
+            if not title:
+                default_title = f"ClickHouse Data Visualization - {chart_type.capitalize()} Chart"
+                title = input(f"\n📝 Enter title for the visualization (default: {default_title}): ")
+                if not title:
+                    title = default_title
+            
+            # Step 4: Save visualization
+            print("\n💾 Saving visualization...\n")
+            
+            save_task = asyncio.create_task(Runner.run(
+                visualization_agent,
+                f"save_visualization({save_visualization_input(handle, filename, title)})",
+                run_config=RunConfig(
+                    tracing_disabled=False
+                )
+            ))
         
-        save_result = await Runner.run(
-            visualization_agent,
-            f"save_visualization({save_input})",
-            run_config=RunConfig(
-                tracing_disabled=False
-            )
-        )
+        save_result = await save_task
         
         # Print result
         print(f"\n🎉 {save_result.final_output}")
@@ -146,4 +178,8 @@ async def run_visualization_demo():
         print("\n👋 Thank you for using ClickHouse Data Visualization Demo!")
 
 if __name__ == "__main__":
-    asyncio.run(run_visualization_demo()) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="ClickHouse data visualization demo")
+    parser.add_argument("--filename", help="File name to save the visualization to")
+    parser.add_argument("--title", help="Title of the chart")
+    args = parser.parse_args()
+    asyncio.run(run_visualization_demo(filename=args.filename, title=args.title)) 
\ No newline at end of file
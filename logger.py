@@ -1,10 +1,10 @@
 import logging
 import os
 import sys
-from dotenv import load_dotenv
+from utils.env_utils import load_env
 
 # Load environment variables
-load_dotenv()
+load_env()
 
 # Configure logger
 logging.basicConfig(
@@ -12,7 +12,7 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.StreamHandler(),
-        logging.FileHandler("agent_runs.log")
+        logging.FileHandler("agent_runs.log", delay=True)
     ]
 )
 
@@ -23,48 +23,50 @@ logger.setLevel(logging.DEBUG)  # Set to DEBUG to capture detailed information
 # Set debug mode based on environment variable
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
 
-# Create a console handler
-console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setLevel(logging.DEBUG)
+# The logger writes through its own handlers only; propagating to the root
+# handlers as well would format and write every record twice
+logger.propagate = False
 
-# Create a formatter
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-console_handler.setFormatter(formatter)
+# Add the handlers once, even if this module is loaded again
+if not logger.handlers:
+    # Create a formatter
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
 
-# Add the console handler to the logger
-logger.addHandler(console_handler)
+    # Create a console handler
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setLevel(logging.DEBUG)
+    console_handler.setFormatter(formatter)
+    logger.addHandler(console_handler)
 
-# Create a file handler
-log_file = "agent_runs.log"
-file_handler = logging.FileHandler(log_file)
-file_handler.setLevel(logging.DEBUG)
-file_handler.setFormatter(formatter)
-
-# Add the file handler to the logger
-logger.addHandler(file_handler)
+    # Create a file handler; the file is opened on the first record
+    log_file = "agent_runs.log"
+    file_handler = logging.FileHandler(log_file, delay=True)
+    file_handler.setLevel(logging.DEBUG)
+    file_handler.setFormatter(formatter)
+    logger.addHandler(file_handler)
 
 def setup_logger():
     """Ensure the logger is set up correctly"""
     logger.debug("Logger initialized with DEBUG level enabled")
     return logger
 
-def debug(message):
-    """Log debug message if DEBUG is enabled"""
+def debug(message, *args):
+    """Log debug message if DEBUG is enabled, formatting any %-style args lazily"""
     if DEBUG:
-        logger.debug(message)
+        logger.debug(message, *args)
 
-def info(message):
-    """Log info message"""
-    logger.info(message)
+def info(message, *args):
+    """Log info message, formatting any %-style args lazily"""
+    logger.info(message, *args)
 
-def warning(message):
-    """Log warning message"""
-    logger.warning(message)
+def warning(message, *args):
+    """Log warning message, formatting any %-style args lazily"""
+    logger.warning(message, *args)
 
-def error(message):
-    """Log error message"""
-    logger.error(message)
+def error(message, *args):
+    """Log error message, formatting any %-style args lazily"""
+    logger.error(message, *args)
 
-def critical(message):
-    """Log critical message"""
-    logger.critical(message) 
\ No newline at end of file
+def critical(message, *args):
+    """Log critical message, formatting any %-style args lazily"""
+    logger.critical(message, *args) 
\ No newline at end of file
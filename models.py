@@ -1,5 +1,9 @@
 from pydantic import BaseModel, Field
 from typing import List, Dict, Optional, Any
+import re
+
+# Matches {placeholder} variables in prompts
+PLACEHOLDER_PATTERN = re.compile(r'\{([a-zA-Z0-9_]+)\}')
 
 class FunctionTool(BaseModel):
     name: str
@@ -54,15 +58,13 @@ class Agent(BaseModel):
         
     def extract_prompt_placeholders(self) -> List[str]:
         """Extract all placeholder variables from the system prompt and additional prompt."""
-        import re
-        
         placeholders = set()
         for text in [self.system_prompt, self.additional_prompt]:
             if not text:
                 continue
                 
             # Find all {placeholder} patterns in the text
-            matches = re.findall(r'\{([a-zA-Z0-9_]+)\}', text)
+            matches = PLACEHOLDER_PATTERN.findall(text)
             placeholders.update(matches)
         
         return list(placeholders)
@@ -3,9 +3,9 @@ from typing import Dict, List, Any, Union
 
 from agents import Agent, function_tool
 import logger
-from tools.tools import get_tool_by_name
+from tools.tools import get_tool_functions
 from utils import load_agents
-from utils.agent_hooks import CustomAgentHooks
+from utils.agent_hooks import hooks_for
 from models import Orchestrator, Agent as AgentModel, PromptField
 from utils.ssl_utils import setup_ssl_bypass
 
@@ -71,18 +71,14 @@ class AgentModelExecutor:
             raise TypeError("agent_model must be either an AgentModel instance or a string agent ID")
 
         # Get tools based on selected_tools names
-        tools = []
-        for tool_name in agent_model.selected_tools:
-            tool_def = get_tool_by_name(tool_name)
-            if tool_def and 'function' in tool_def:
-                tools.append(tool_def['function'])
+        tools = get_tool_functions(agent_model.selected_tools)
 
         # Create the agent (without description parameter)
         agent = Agent(
             name=agent_model.name,
             instructions=agent_model.system_prompt,
             tools=tools,
-            hooks=CustomAgentHooks(display_name=agent_model.name),
+            hooks=hooks_for(agent_model.name),
         )
         
         # Return both the agent and its description separately
@@ -1,15 +1,17 @@
+import asyncio
 import os
-from typing import Dict, List, Any, AsyncIterator
+from typing import Dict, List, Any, Optional
 
-from agents import Agent, RunConfig, Runner, function_tool, RunResultStreaming, StreamEvent
+from agents import Agent, RunConfig, Runner, function_tool, RunResultStreaming
 
 from runner.modelProvider import CustomModelProvider
 from .agent import AgentModelExecutor
 import logger
 from utils import load_agents, load_orchestrators
-from utils.agent_hooks import CustomAgentHooks
+from utils.agent_hooks import hooks_for
 from models import Orchestrator, Agent as AgentModel, PromptField
 from utils.ssl_utils import setup_ssl_bypass
+from utils.openai_limits import run_with_openai_limits
 
 
 class OrchestratorModelExecutor:
@@ -24,7 +26,6 @@ class OrchestratorModelExecutor:
         self.http_client = setup_ssl_bypass()
         logger.info("SSL bypass setup completed for agent executor")
         self.isOpenAI = os.getenv("IS_OPENAI") == "true"
-        self.last_run_result = None
 
     def modelProvider(self):
         if self.isOpenAI is False:
@@ -32,11 +33,13 @@ class OrchestratorModelExecutor:
         
         return None
 
-    def initialize_orchestrator_model(self, orchestratorId: str) -> Orchestrator:
+    def initialize_orchestrator_model(self, orchestratorId: str, orchestrator_data: Optional[Dict[str, Any]] = None) -> Orchestrator:
         """Initialize the orchestrator
         
         Args:
             orchestratorId: The ID of the orchestrator to initialize
+            orchestrator_data: The orchestrator's stored data, if the caller already has it;
+                otherwise it is looked up in the orchestrators store
             
         Returns:
             The initialized orchestrator model
@@ -45,20 +48,22 @@ class OrchestratorModelExecutor:
             KeyError: If the orchestrator ID is not found
         """
         try:
-            orchestrator_data = load_orchestrators()
-            orchestrator_dict = orchestrator_data[orchestratorId]
+            if orchestrator_data is None:
+                orchestrator_data = load_orchestrators()[orchestratorId]
             # Convert the dictionary to an Orchestrator object
-            orchestrator = Orchestrator.from_dict(orchestrator_dict)
+            orchestrator = Orchestrator.from_dict(orchestrator_data)
             return orchestrator
         except KeyError:
             logger.error(f"Orchestrator with ID {orchestratorId} not found")
             raise KeyError(f"Orchestrator with ID {orchestratorId} not found")
     
-    def create_orchestrator_from_data(self, orchestrator: Orchestrator) -> Agent:
+    def create_orchestrator_from_data(self, orchestrator: Orchestrator, agents_data: Optional[Dict[str, Any]] = None) -> Agent:
         """Create an orchestrator from model class
         
         Args:
             orchestrator: The orchestrator model to create from
+            agents_data: The agents store, if the caller already loaded it;
+                otherwise it is loaded here
             
         Returns:
             The created orchestrator agent
@@ -67,8 +72,12 @@ class OrchestratorModelExecutor:
         agents = []
         agent_descriptions = {}
         
+        # One snapshot of the agents store for every agent in the orchestrator
+        if agents_data is None:
+            agents_data = load_agents()
         for agent_id in orchestrator.agents:
-            agent, description = self.agent_executor.create_agent_from_data(agent_id)
+            agent_model = AgentModel.from_dict(agents_data[agent_id])
+            agent, description = self.agent_executor.create_agent_from_data(agent_model)
             agents.append(agent)
             agent_descriptions[agent.name] = description
 
@@ -85,25 +94,28 @@ class OrchestratorModelExecutor:
             name=orchestrator.name,
             tools=agent_tools,
             instructions=orchestrator.system_prompt,
-            hooks=CustomAgentHooks(display_name=orchestrator.name)
+            hooks=hooks_for(orchestrator.name)
         )
 
         return orchestrator_agent
 
-    async def run_orchestrator_Id(self, orchestratorId: str, user_input: str) -> Any:
+    async def run_orchestrator_Id(self, orchestratorId: str, user_input: str, orchestrator_data: Optional[Dict[str, Any]] = None) -> Any:
         """Run the orchestrator
         
         Args:
             orchestratorId: The ID of the orchestrator to run
             user_input: The user input to process
+            orchestrator_data: The orchestrator's stored data, if the caller already loaded it
             
         Returns:
             The result of running the orchestrator
         """
         logger.info(f"Running orchestrator {orchestratorId} with user input {user_input}")
         try:
-            orchestrator_model = self.initialize_orchestrator_model(orchestratorId)
-            orchestrator = self.create_orchestrator_from_data(orchestrator_model)
+            orchestrator_model = self.initialize_orchestrator_model(orchestratorId, orchestrator_data)
+            # Read the agents store off the event loop
+            agents_data = await asyncio.to_thread(load_agents)
+            orchestrator = self.create_orchestrator_from_data(orchestrator_model, agents_data)
 
             runConfig = RunConfig(tracing_disabled=False)
             
@@ -112,32 +124,38 @@ class OrchestratorModelExecutor:
 
             logger.info(f"Running orchestrator {orchestratorId} with user input {user_input} and runConfig {runConfig}")
 
-            orchestrator_result = await Runner.run(
+            orchestrator_result = await run_with_openai_limits(lambda: Runner.run(
                 orchestrator,
                 user_input,
                 run_config=runConfig
-            )
+            ))
 
-            self.last_run_result = orchestrator_result.final_output
             return orchestrator_result.final_output
         except Exception as e:
             logger.error(f"Error running orchestrator {orchestratorId}: {str(e)}")
             raise
 
-    async def stream_orchestrator_run_by_id(self, orchestratorId: str, user_input: str) -> AsyncIterator[StreamEvent]:
-        """Stream the orchestrator run events
+    def start_orchestrator_stream(self, orchestratorId: str, user_input: str, orchestrator_data: Optional[Dict[str, Any]] = None, agents_data: Optional[Dict[str, Any]] = None) -> RunResultStreaming:
+        """Start a streamed orchestrator run
+        
+        The executor keeps no per-run state, so one instance can serve
+        concurrent runs; everything about the run lives on the returned result.
         
         Args:
             orchestratorId: The ID of the orchestrator to run
             user_input: The user input to process
+            orchestrator_data: The orchestrator's stored data, if the caller already loaded it
+            agents_data: The agents store, if the caller already loaded it; callers on
+                the event loop should load it in a worker thread and pass it in
             
-        Yields:
-            StreamEvent objects containing run updates
+        Returns:
+            The streaming result; iterate stream_events() for run updates and
+            read final_output once the stream is exhausted
         """
         logger.info(f"Streaming orchestrator {orchestratorId} with user input {user_input}")
         try:
-            orchestrator_model = self.initialize_orchestrator_model(orchestratorId)
-            orchestrator = self.create_orchestrator_from_data(orchestrator_model)
+            orchestrator_model = self.initialize_orchestrator_model(orchestratorId, orchestrator_data)
+            orchestrator = self.create_orchestrator_from_data(orchestrator_model, agents_data)
 
             runConfig = RunConfig(tracing_disabled=False)
             
@@ -148,32 +166,11 @@ class OrchestratorModelExecutor:
             logger.info(f"Streaming orchestrator {orchestratorId} with user input {user_input} and runConfig {runConfig}")
 
             # Use the streamed version of run
-            streaming_result: RunResultStreaming = Runner.run_streamed(
+            return Runner.run_streamed(
                 orchestrator,
                 user_input,
                 run_config=runConfig
             )
-            
-            # Yield all events from the stream
-            async for event in streaming_result.stream_events():
-                yield event
-                
-                # If it's the last event with final output, save it
-                if hasattr(event, "final_output") and event.final_output is not None:
-                    self.last_run_result = event.final_output
-            
-            # If we didn't get the final output from the events, get it from the result
-            if self.last_run_result is None and hasattr(streaming_result, "final_output"):
-                self.last_run_result = streaming_result.final_output
-                
         except Exception as e:
             logger.error(f"Error streaming orchestrator {orchestratorId}: {str(e)}")
             raise
-
-    def get_last_run_result(self) -> Any:
-        """Get the result of the last run
-        
-        Returns:
-            The result of the last orchestrator run
-        """
-        return self.last_run_result
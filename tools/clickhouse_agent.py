@@ -3,16 +3,32 @@ from agents import Agent, function_tool
 import logging
 import os
 from dotenv import load_dotenv
-from clickhouse_connect.driver.binding import quote_identifier, format_query_value
 
 
 from utils.agent_hooks import CustomAgentHooks
-from utils.clickhouse_utils import get_clickhouse_client
+from utils.tool_utils import run_in_worker_thread
+from utils.clickhouse_utils import (
+    get_clickhouse_client,
+    query_cache,
+    is_cacheable_query,
+    METADATA_CACHE_TTL,
+    QUERY_CACHE_TTL,
+    QUERY_CACHE_MAX_ROWS,
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Metadata queries, with identifiers bound server-side as parameters rather
+# than interpolated into the SQL text
+QUERY_TEMPLATES = {
+    "describe_table": "DESCRIBE TABLE {table:Identifier}",
+    "describe_table_in": "DESCRIBE TABLE {database:Identifier}.{table:Identifier}",
+    "show_create_table": "SHOW CREATE TABLE {table:Identifier}",
+    "show_create_table_in": "SHOW CREATE TABLE {database:Identifier}.{table:Identifier}",
+}
+
 # @function_tool
 # def show_databases() -> List[str]:
 #     """
@@ -220,57 +236,65 @@ logger = logging.getLogger(__name__)
 #         return f"Error: {str(e)}"
 
 @function_tool
+@run_in_worker_thread
 def describe_table(table: str, database: str = None) -> List[Dict]:
     """
     Describe the structure of a specified ClickHouse table.
     If no database is specified, uses the default database from connection.
     Returns a list of dictionaries containing column names and types.
     """
-    
+    cache_key = ("describe", database, table)
+    cached = query_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     client = get_clickhouse_client(database=database)
 
     logger.info(f"Getting schema info for table {database}.{table}")
-    schema_query = f"DESCRIBE TABLE {quote_identifier(database)}.{quote_identifier(table)}"
-    schema_result = client.query(schema_query)
+    # Without a database the table resolves against the client's default one
+    suffix = "_in" if database else ""
+    parameters = {"database": database, "table": table} if database else {"table": table}
+    schema_result = client.query(QUERY_TEMPLATES["describe_table" + suffix], parameters=parameters)
 
-    columns = []
-    column_names = schema_result.column_names
-    for row in schema_result.result_rows:
-        column_dict = {}
-        for i, col_name in enumerate(column_names):
-            column_dict[col_name] = row[i]
-       
-        columns.append(column_dict)
+    columns = list(schema_result.named_results())
 
-    create_table_query = f"SHOW CREATE TABLE {database}.`{table}`"
-    create_table_result = client.command(create_table_query)
+    create_table_result = client.command(QUERY_TEMPLATES["show_create_table" + suffix], parameters=parameters)
 
-    return {
+    description = {
         "database": database,
         "name": table,
         "columns": columns,
         "create_table_query": create_table_result,
-    }    
+    }
+    query_cache.set(cache_key, description, METADATA_CACHE_TTL)
+    return description
 
 
 @function_tool
+@run_in_worker_thread
 def run_query(query: str, database: str = None) -> List[Dict]:
     """
     Run a custom SQL query on ClickHouse.
     Returns the query results as a list of dictionaries.
     Use with caution, as this allows arbitrary SQL execution.
     """
+    cache_key = ("query", database, query)
+    cacheable = is_cacheable_query(query)
+    if cacheable:
+        cached = query_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Query returned {len(cached)} rows (cached)")
+            return cached
+
     client = get_clickhouse_client(database=database)
     try:
         res = client.query(query, settings={"readonly": 1})
-        column_names = res.column_names
-        rows = []
-        for row in res.result_rows:
-            row_dict = {}
-            for i, col_name in enumerate(column_names):
-                row_dict[col_name] = row[i]
-            rows.append(row_dict)
+        # named_results zips each row with the column names, avoiding a
+        # per-cell Python loop on large results
+        rows = list(res.named_results())
         logger.info(f"Query returned {len(rows)} rows")
+        if cacheable and len(rows) <= QUERY_CACHE_MAX_ROWS:
+            query_cache.set(cache_key, rows, QUERY_CACHE_TTL)
         return rows
     except Exception as err:
         logger.error(f"Error executing query: {err}")
@@ -1,6 +1,7 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 import sys
 import os
+from functools import lru_cache
 
 # Add parent directory to sys.path to access experiments
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -163,13 +164,19 @@ DEFAULT_FUNCTION_TOOLS = [
     }
 ]
 
-def get_available_tools() -> List[Dict[str, Any]]:
-    """
-    Get the list of available function tools.
-    
-    Returns:
-        List[Dict[str, Any]]: List of function tools
-    """
+# Tool definitions by name, keeping the first definition of a repeated name
+TOOLS_BY_NAME: Dict[str, Dict[str, Any]] = {}
+for _tool in DEFAULT_FUNCTION_TOOLS:
+    TOOLS_BY_NAME.setdefault(_tool["name"], _tool)
+
+# SDK function tools by name, for the tools that have one
+TOOL_FUNCTIONS: Dict[str, Any] = {
+    name: tool["function"] for name, tool in TOOLS_BY_NAME.items() if "function" in tool
+}
+
+@lru_cache(maxsize=1)
+def _serializable_tools() -> Tuple[Dict[str, Any], ...]:
+    """Build the serializable tool definitions once; the tool list is fixed at import time"""
     # Create a copy of tools without function references to ensure it can be serialized by Pydantic
     serializable_tools = []
     for tool in DEFAULT_FUNCTION_TOOLS:
@@ -177,7 +184,16 @@ def get_available_tools() -> List[Dict[str, Any]]:
         serializable_tool = {k: v for k, v in tool.items() if k != 'function'}
         serializable_tools.append(serializable_tool)
     
-    return serializable_tools
+    return tuple(serializable_tools)
+
+def get_available_tools() -> List[Dict[str, Any]]:
+    """
+    Get the list of available function tools.
+    
+    Returns:
+        List[Dict[str, Any]]: List of function tools
+    """
+    return list(_serializable_tools())
 
 def get_tool_by_name(name: str) -> Dict[str, Any]:
     """
@@ -189,10 +205,19 @@ def get_tool_by_name(name: str) -> Dict[str, Any]:
     Returns:
         Dict[str, Any]: Tool definition
     """
-    for tool in DEFAULT_FUNCTION_TOOLS:
-        if tool["name"] == name:
-            return tool
-    return None
+    return TOOLS_BY_NAME.get(name)
+
+def get_tool_functions(names: List[str]) -> List[Any]:
+    """
+    Get the SDK function tools for a list of tool names.
+    
+    Args:
+        names (List[str]): Names of the tools
+        
+    Returns:
+        List[Any]: Function tools, skipping unknown names and tools without a function
+    """
+    return [TOOL_FUNCTIONS[name] for name in names if name in TOOL_FUNCTIONS]
 
 
 # # Additional ClickHouse tools
@@ -1,10 +1,10 @@
 from typing import List, Dict, Any
 from agents import Agent, function_tool
 import os
-import pandas as pd
-import json
+import orjson
 
 from utils.agent_hooks import CustomAgentHooks
+from utils.tool_utils import memoize_tool_result, run_in_worker_thread
 from utils.visualization_utils import (
     generate_html_plot, 
     save_html_plot,
@@ -14,6 +14,8 @@ from utils.visualization_utils import (
 )
 
 @function_tool
+@run_in_worker_thread
+@memoize_tool_result()
 def visualize_data(data_input: str) -> str:
     """
     Visualizes the data and returns the HTML content.
@@ -30,10 +32,10 @@ def visualize_data(data_input: str) -> str:
     """
     # Parse input JSON
     try:
-        input_dict = json.loads(data_input)
+        input_dict = orjson.loads(data_input)
         data = input_dict.get("data", [])
         title = input_dict.get("title")
-    except (json.JSONDecodeError, TypeError):
+    except (orjson.JSONDecodeError, TypeError):
         return "Invalid input format. Please provide a valid JSON string."
     
     if not data:
@@ -43,12 +45,16 @@ def visualize_data(data_input: str) -> str:
     if not title:
         title = "ClickHouse Data Visualization"
     
+    # Build the DataFrame once for the checks and the plot
+    import pandas as pd
+    df = pd.DataFrame(data)
+    
     # Check if data is plottable
-    if not is_plottable(data):
+    if not is_plottable(df):
         return "The data cannot be visualized as a chart because it doesn't contain numeric columns"
     
     # Generate the HTML for the plot
-    html_content = generate_html_plot(data, title)
+    html_content = generate_html_plot(df, title)
     
     return html_content
 
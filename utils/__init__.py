@@ -1,9 +1,95 @@
 # Utils module for the project 
 
-import json
+import copy
 import os
+import threading
 import uuid
-from typing import Dict, Any, List
+import orjson
+from typing import Dict, Any, List, Optional
+
+AGENTS_FILE = "data/agents.json"
+ORCHESTRATORS_FILE = "data/orchestrators.json"
+
+# In-process caches of the parsed JSON stores, keyed on the file's mtime so
+# unchanged files skip the disk read and parse entirely. "list_json" and
+# "record_json" hold the encoded list and per-record endpoint responses for the
+# same data, built on first use.
+_AgentsCache = {"mtime": 0, "data": None, "list_json": None, "record_json": {}}
+_OrchestratorsCache = {"mtime": 0, "data": None, "list_json": None, "record_json": {}}
+_cache_lock = threading.Lock()
+
+def _load_cached(path: str, cache: Dict[str, Any], mutable: bool) -> Dict[str, Any]:
+    """
+    Load a JSON store through its mtime cache.
+    
+    Args:
+        path (str): Path of the JSON file
+        cache (Dict[str, Any]): Cache entry holding the last mtime and data
+        mutable (bool): Return a private deep copy the caller may modify
+        
+    Returns:
+        Dict[str, Any]: Parsed file contents
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    
+    with _cache_lock:
+        if cache["data"] is None or cache["mtime"] != mtime:
+            with open(path, "rb") as f:
+                cache["data"] = orjson.loads(f.read())
+            cache["mtime"] = mtime
+            cache["list_json"] = None
+            cache["record_json"] = {}
+        data = cache["data"]
+    
+    return copy.deepcopy(data) if mutable else data
+
+def _save_cached(path: str, cache: Dict[str, Any], data: Dict[str, Any]) -> None:
+    """
+    Write a JSON store and refresh its cache entry.
+    
+    The file is written to a temporary path and renamed over the original,
+    so a crash mid-write never leaves a truncated store behind.
+    
+    Args:
+        path (str): Path of the JSON file
+        cache (Dict[str, Any]): Cache entry to refresh
+        data (Dict[str, Any]): Data to save
+    """
+    with _cache_lock:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        cache["data"] = data
+        cache["mtime"] = os.stat(path).st_mtime_ns
+        cache["list_json"] = None
+        cache["record_json"] = {}
+
+def _load_cached_list_json(path: str, cache: Dict[str, Any]) -> bytes:
+    """
+    Get a JSON store encoded as a list of records with their IDs.
+    
+    Args:
+        path (str): Path of the JSON file
+        cache (Dict[str, Any]): Cache entry holding the last mtime and data
+        
+    Returns:
+        bytes: JSON array of {"id": ..., **record}
+    """
+    data = _load_cached(path, cache, mutable=False)
+    with _cache_lock:
+        # Only reuse the encoding if it was built from the data just loaded
+        if cache["list_json"] is None or cache["data"] is not data:
+            list_json = orjson.dumps([{"id": key, **value} for key, value in data.items()])
+            if cache["data"] is not data:
+                return list_json
+            cache["list_json"] = list_json
+        return cache["list_json"]
 
 def save_agents(agents: Dict[str, Any]) -> None:
     """
@@ -12,8 +98,7 @@ def save_agents(agents: Dict[str, Any]) -> None:
     Args:
         agents (Dict[str, Any]): Dictionary of agents
     """
-    with open("data/agents.json", "w") as f:
-        json.dump(agents, f, indent=2)
+    _save_cached(AGENTS_FILE, _AgentsCache, agents)
 
 def save_orchestrators(orchestrators: Dict[str, Any]) -> None:
     """
@@ -22,32 +107,103 @@ def save_orchestrators(orchestrators: Dict[str, Any]) -> None:
     Args:
         orchestrators (Dict[str, Any]): Dictionary of orchestrators
     """
-    with open("data/orchestrators.json", "w") as f:
-        json.dump(orchestrators, f, indent=2)
+    _save_cached(ORCHESTRATORS_FILE, _OrchestratorsCache, orchestrators)
 
-def load_agents() -> Dict[str, Any]:
+def load_agents(mutable: bool = False) -> Dict[str, Any]:
     """
     Load agents from a JSON file.
     
+    The returned dictionary is shared with the cache and must be treated as
+    read-only unless mutable=True is passed.
+    
+    Args:
+        mutable (bool): Return a copy that can be modified and saved
+    
     Returns:
         Dict[str, Any]: Dictionary of agents
     """
-    if os.path.exists("data/agents.json"):
-        with open("data/agents.json", "r") as f:
-            return json.load(f)
-    return {}
+    return _load_cached(AGENTS_FILE, _AgentsCache, mutable)
 
-def load_orchestrators() -> Dict[str, Any]:
+def load_orchestrators(mutable: bool = False) -> Dict[str, Any]:
     """
     Load orchestrators from a JSON file.
     
+    The returned dictionary is shared with the cache and must be treated as
+    read-only unless mutable=True is passed.
+    
+    Args:
+        mutable (bool): Return a copy that can be modified and saved
+    
     Returns:
         Dict[str, Any]: Dictionary of orchestrators
     """
-    if os.path.exists("data/orchestrators.json"):
-        with open("data/orchestrators.json", "r") as f:
-            return json.load(f)
-    return {}
+    return _load_cached(ORCHESTRATORS_FILE, _OrchestratorsCache, mutable)
+
+def _load_cached_record_json(path: str, cache: Dict[str, Any], record_id: str) -> Optional[bytes]:
+    """
+    Get one record of a JSON store encoded with its ID.
+    
+    Args:
+        path (str): Path of the JSON file
+        cache (Dict[str, Any]): Cache entry holding the last mtime and data
+        record_id (str): ID of the record
+        
+    Returns:
+        Optional[bytes]: JSON object {"id": ..., **record}, or None if there is no such record
+    """
+    data = _load_cached(path, cache, mutable=False)
+    if record_id not in data:
+        return None
+    with _cache_lock:
+        record_json = cache["record_json"].get(record_id) if cache["data"] is data else None
+        if record_json is None:
+            record_json = orjson.dumps({"id": record_id, **data[record_id]})
+            # Only keep the encoding if it was built from the data currently cached
+            if cache["data"] is data:
+                cache["record_json"][record_id] = record_json
+        return record_json
+
+def load_agents_json() -> bytes:
+    """
+    Load all agents as an encoded JSON list, cached until the file changes.
+    
+    Returns:
+        bytes: JSON array of agents, each including its ID
+    """
+    return _load_cached_list_json(AGENTS_FILE, _AgentsCache)
+
+def load_orchestrators_json() -> bytes:
+    """
+    Load all orchestrators as an encoded JSON list, cached until the file changes.
+    
+    Returns:
+        bytes: JSON array of orchestrators, each including its ID
+    """
+    return _load_cached_list_json(ORCHESTRATORS_FILE, _OrchestratorsCache)
+
+def load_agent_json(agent_id: str) -> Optional[bytes]:
+    """
+    Load one agent as encoded JSON, cached until the file changes.
+    
+    Args:
+        agent_id (str): ID of the agent
+        
+    Returns:
+        Optional[bytes]: JSON object of the agent including its ID, or None if not found
+    """
+    return _load_cached_record_json(AGENTS_FILE, _AgentsCache, agent_id)
+
+def load_orchestrator_json(orchestrator_id: str) -> Optional[bytes]:
+    """
+    Load one orchestrator as encoded JSON, cached until the file changes.
+    
+    Args:
+        orchestrator_id (str): ID of the orchestrator
+        
+    Returns:
+        Optional[bytes]: JSON object of the orchestrator including its ID, or None if not found
+    """
+    return _load_cached_record_json(ORCHESTRATORS_FILE, _OrchestratorsCache, orchestrator_id)
 
 def generate_id() -> str:
     """
@@ -68,7 +224,7 @@ def delete_agent(agent_id: str) -> bool:
     Returns:
         bool: True if successful, False otherwise
     """
-    agents = load_agents()
+    agents = load_agents(mutable=True)
     if agent_id in agents:
         # Check if agent is used in any orchestrator
         orchestrators = load_orchestrators()
@@ -99,10 +255,10 @@ def delete_orchestrator(orchestrator_id: str) -> bool:
     Returns:
         bool: True if successful, False otherwise
     """
-    orchestrators = load_orchestrators()
+    orchestrators = load_orchestrators(mutable=True)
     if orchestrator_id in orchestrators:
         del orchestrators[orchestrator_id]
         save_orchestrators(orchestrators)
         return True
     
-    return False 
\ No newline at end of file
+    return False 
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Any
 from agents import Agent, AgentHooks, RunContextWrapper, Tool
 
@@ -34,4 +35,9 @@ class CustomAgentHooks(AgentHooks):
         self.event_counter += 1
         print(
             f"### ({self.display_name}) {self.event_counter}: Agent {agent.name} ended tool {tool.name} with result {result}"
-        ) 
\ No newline at end of file
+        ) 
+
+@lru_cache(maxsize=256)
+def hooks_for(display_name: str) -> CustomAgentHooks:
+    """Get the shared hooks for a display name; the only per-instance state is the event counter used to number log lines"""
+    return CustomAgentHooks(display_name=display_name)
@@ -1,31 +1,150 @@
 import os
+import re
+import time
 import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from dotenv import load_dotenv
 import clickhouse_connect
 from clickhouse_connect.driver.exceptions import ClickHouseError
-from typing import List, Dict
+from typing import Any, Hashable, List, Dict, NamedTuple, Optional
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def get_clickhouse_client(database=None, tables=None):
-    """Get a ClickHouse client using environment variables"""
-    # Force reload environment variables to ensure fresh values
+# Seconds a cached table description stays valid
+METADATA_CACHE_TTL = float(os.environ.get("CLICKHOUSE_METADATA_CACHE_TTL", "60"))
+
+# Seconds a cached SELECT result stays valid; 0 disables caching query results
+QUERY_CACHE_TTL = float(os.environ.get("CLICKHOUSE_QUERY_CACHE_TTL", "0"))
+
+# Results with more rows than this are not cached
+QUERY_CACHE_MAX_ROWS = 1000
+
+# Maximum number of cached results
+QUERY_CACHE_SIZE = 512
+
+# Maximum number of cached clients, one per database name; the names come
+# from tool arguments, so an unbounded cache would keep a client and its
+# connection pool for every distinct or misspelled one
+CLICKHOUSE_CLIENT_CACHE_SIZE = 16
+
+# Only read-only statements are safe to answer from the cache
+CACHEABLE_QUERY_PATTERN = re.compile(r'^\s*(SELECT|WITH)\b', re.IGNORECASE)
+
+class QueryResultCache:
+    """
+    Bounded LRU of query results that expire after a TTL.
+
+    Agents repeat the same metadata lookups and queries across the turns of
+    a conversation; answering those from memory skips the ClickHouse round
+    trip. Guarded by a lock, since tool calls run in worker threads.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up a cached result.
+
+        Args:
+            key (Hashable): Identifies the query, e.g. (database, sql)
+
+        Returns:
+            Optional[Any]: The cached result, or None if absent or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """
+        Cache a result, evicting the least recently used one when full.
+
+        Args:
+            key (Hashable): Identifies the query, e.g. (database, sql)
+            value (Any): The result
+            ttl (float): Seconds the result stays valid
+        """
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached result"""
+        with self._lock:
+            self._entries.clear()
+
+# Shared by the ClickHouse tools
+query_cache = QueryResultCache(QUERY_CACHE_SIZE)
+
+def is_cacheable_query(query: str) -> bool:
+    """Whether a query's result may be served from the cache"""
+    return QUERY_CACHE_TTL > 0 and CACHEABLE_QUERY_PATTERN.match(query) is not None
+
+class ClickHouseSettings(NamedTuple):
+    """Connection settings read from the environment"""
+    host: Optional[str]
+    port: Optional[str]
+    username: str
+    password: str
+    database: Optional[str]
+
+@lru_cache(maxsize=1)
+def get_clickhouse_settings() -> ClickHouseSettings:
+    """Read the ClickHouse connection settings once, loading the .env file first"""
     load_dotenv(override=True)
-    
-    # Get connection details from environment
-    host = os.environ.get("CLICKHOUSE_HOST")
-    port = os.environ.get("CLICKHOUSE_PORT")
-    username = os.environ.get("CLICKHOUSE_USER", "default")
-    password = os.environ.get("CLICKHOUSE_PASSWORD", "")
-    
+    return ClickHouseSettings(
+        host=os.environ.get("CLICKHOUSE_HOST"),
+        port=os.environ.get("CLICKHOUSE_PORT"),
+        username=os.environ.get("CLICKHOUSE_USER", "default"),
+        password=os.environ.get("CLICKHOUSE_PASSWORD", ""),
+        database=os.environ.get("CLICKHOUSE_DATABASE"),
+    )
+
+def get_clickhouse_client(database=None, tables=None):
+    """
+    Get a ClickHouse client using environment variables.
+
+    Clients are created once per database and reused, so tool calls share
+    the client's pooled keep-alive HTTP connections instead of connecting
+    anew each time. Call clear_clickhouse_clients() after changing the
+    connection settings.
+    """
+    return _cached_clickhouse_client(database or None)
+
+def clear_clickhouse_clients():
+    """Forget the cached settings and clients, so the next call rereads the environment and reconnects"""
+    get_clickhouse_settings.cache_clear()
+    _cached_clickhouse_client.cache_clear()
+
+@lru_cache(maxsize=CLICKHOUSE_CLIENT_CACHE_SIZE)
+def _cached_clickhouse_client(database):
+    """Create the ClickHouse client for a database"""
+    settings = get_clickhouse_settings()
+    host, port, username = settings.host, settings.port, settings.username
 
     # Determine which database to use
     if database:
         db_name = database
     else:
-        db_name = os.environ.get("CLICKHOUSE_DATABASE")
+        db_name = settings.database
         if not db_name:
             logger.warning("CLICKHOUSE_DATABASE not set in .env file. Using default database.")
             db_name = "default"
@@ -40,10 +159,13 @@ def get_clickhouse_client(database=None, tables=None):
             host=host,
             port=port,
             username=username,
-            password=password,
+            password=settings.password,
             database=db_name,
             secure=False,
-            verify=False
+            verify=False,
+            # Tool calls run concurrently in worker threads; a shared session
+            # would make ClickHouse reject overlapping queries
+            autogenerate_session_id=False
         )
 
         return client
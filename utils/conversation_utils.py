@@ -0,0 +1,725 @@
+import os
+import re
+import shutil
+import threading
+import uuid
+import ijson
+import orjson
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from typing import BinaryIO, Dict, Any, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    # No flock on Windows; writes are then serialized within one process only
+    fcntl = None
+
+# Whether conversation writes are serialized across worker processes too
+CROSS_PROCESS_LOCKING = fcntl is not None
+
+CONVERSATIONS_DIR = "data/conversations"
+
+# Per-conversation index state: a small summary file per conversation, which
+# is also the lock its writers hold, and the conversation's search postings
+INDEX_DIR = os.path.join(CONVERSATIONS_DIR, "_index")
+SUMMARY_EXT = ".summary"
+POSTINGS_EXT = ".postings"
+
+# Sidecar index written by earlier versions, skipped when listing conversations
+LEGACY_INDEX_FILE = os.path.join(CONVERSATIONS_DIR, "_index.json")
+
+# Conversations are stored as JSON Lines, one message per line, so a new
+# message is a single append. Older conversations may still be a JSON array
+# in a .json file; they are migrated the first time they are written to.
+CONVERSATION_EXT = ".jsonl"
+LEGACY_CONVERSATION_EXT = ".json"
+
+# Threads used to recount stale conversation summaries
+INDEX_REBUILD_WORKERS = min(32, (os.cpu_count() or 1) * 2)
+
+# Serializes conversation writes when flock is not available
+_conversation_lock = threading.Lock()
+
+def conversation_id_from_path(file_path: str) -> str:
+    """Return the conversation ID a conversation file belongs to"""
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+def conversation_path(conversation_id: str) -> str:
+    """
+    Resolve the file holding a conversation.
+
+    Args:
+        conversation_id (str): ID of the conversation
+
+    Returns:
+        str: Path of the JSONL file, or of the legacy JSON file if only that exists
+    """
+    path = os.path.join(CONVERSATIONS_DIR, conversation_id + CONVERSATION_EXT)
+    legacy_path = os.path.join(CONVERSATIONS_DIR, conversation_id + LEGACY_CONVERSATION_EXT)
+    if not os.path.exists(path) and os.path.exists(legacy_path):
+        return legacy_path
+    return path
+
+def conversation_files() -> List[str]:
+    """
+    List the conversation history files, excluding the index sidecar.
+
+    Returns:
+        List[str]: Paths of the conversation files, one per conversation
+    """
+    files = {}
+    try:
+        # A single directory pass; DirEntry.is_file uses the type from the directory listing
+        with os.scandir(CONVERSATIONS_DIR) as entries:
+            for entry in entries:
+                if entry.name == os.path.basename(LEGACY_INDEX_FILE) or not entry.is_file():
+                    continue
+                conversation_id, ext = os.path.splitext(entry.name)
+                # A JSONL file supersedes a legacy file left behind by an interrupted migration
+                if ext == CONVERSATION_EXT or (ext == LEGACY_CONVERSATION_EXT and conversation_id not in files):
+                    files[conversation_id] = entry.path
+    except FileNotFoundError:
+        return []
+    return list(files.values())
+
+def _iter_jsonl_messages(lines: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+    """Decode JSONL lines, skipping blank lines and a line torn by an interrupted append"""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield orjson.loads(line)
+        except orjson.JSONDecodeError:
+            continue
+
+def parse_conversation(file_path: str, data: bytes) -> List[Dict[str, Any]]:
+    """
+    Parse the raw contents of a conversation file.
+
+    Args:
+        file_path (str): Path the contents were read from, used to detect the format
+        data (bytes): File contents
+
+    Returns:
+        List[Dict[str, Any]]: Conversation history, or an empty list if it is corrupt
+    """
+    try:
+        if file_path.endswith(CONVERSATION_EXT):
+            return list(_iter_jsonl_messages(data.splitlines()))
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        return []
+
+def load_conversation_file(file_path: str) -> List[Dict[str, Any]]:
+    """Load conversation history from a file"""
+    try:
+        with open(file_path, "rb") as f:
+            if file_path.endswith(CONVERSATION_EXT):
+                # Decode line by line rather than holding the whole file and its split copy
+                return list(_iter_jsonl_messages(f))
+            return parse_conversation(file_path, f.read())
+    except FileNotFoundError:
+        return []
+
+def load_conversation(conversation_id: str) -> List[Dict[str, Any]]:
+    """
+    Load a conversation by ID.
+
+    Opens the JSONL file directly and falls back to the legacy JSON file only
+    when it is missing, rather than stat-ing both up front.
+
+    Args:
+        conversation_id (str): ID of the conversation
+
+    Returns:
+        List[Dict[str, Any]]: Conversation history, or an empty list if there is none
+    """
+    try:
+        with open(os.path.join(CONVERSATIONS_DIR, conversation_id + CONVERSATION_EXT), "rb") as f:
+            return list(_iter_jsonl_messages(f))
+    except FileNotFoundError:
+        return load_conversation_file(os.path.join(CONVERSATIONS_DIR, conversation_id + LEGACY_CONVERSATION_EXT))
+
+def iter_conversation_file(file_path: str) -> Iterator[Dict[str, Any]]:
+    """Lazily yield the messages of a conversation file without parsing it all up front"""
+    try:
+        with open(file_path, "rb") as f:
+            if file_path.endswith(CONVERSATION_EXT):
+                yield from _iter_jsonl_messages(f)
+            else:
+                yield from ijson.items(f, "item", use_float=True)
+    except ijson.JSONError:
+        return
+    except FileNotFoundError:
+        return
+
+def _write_conversation(conversation_id: str, history: List[Dict[str, Any]]) -> None:
+    """Atomically write a whole conversation as JSONL and drop any legacy file"""
+    os.makedirs(CONVERSATIONS_DIR, exist_ok=True)
+    path = os.path.join(CONVERSATIONS_DIR, conversation_id + CONVERSATION_EXT)
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(b"".join(orjson.dumps(message) + b"\n" for message in history))
+    os.replace(tmp_file, path)
+
+    legacy_path = os.path.join(CONVERSATIONS_DIR, conversation_id + LEGACY_CONVERSATION_EXT)
+    if os.path.exists(legacy_path):
+        os.remove(legacy_path)
+
+def _append_records(file_path: str, records: bytes) -> Tuple[int, int]:
+    """
+    Append newline-terminated records to a file in a single write.
+
+    Returns:
+        Tuple[int, int]: Size of the file before the append, and bytes written
+    """
+    with open(file_path, "a+b") as f:
+        # Start on a fresh line if an earlier append was cut short, so the
+        # new records are not glued onto the torn one
+        size = f.seek(0, os.SEEK_END)
+        if size > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                records = b"\n" + records
+        # A single write, so each record lands whole or as one torn line
+        f.write(records)
+    return size, len(records)
+
+def summary_path(conversation_id: str) -> str:
+    """Return the file holding a conversation's summary"""
+    return os.path.join(INDEX_DIR, conversation_id + SUMMARY_EXT)
+
+@contextmanager
+def _locked_summary(conversation_id: str) -> Iterator[BinaryIO]:
+    """
+    Hold a conversation's write lock, yielding its open summary file.
+
+    The lock is an flock on the summary file, so it covers threads and worker
+    processes alike. The file is rewritten in place and never removed, so
+    every writer locks the same file.
+    """
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    with _conversation_lock if fcntl is None else nullcontext():
+        with open(summary_path(conversation_id), "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield f
+
+def _read_summary(f: BinaryIO) -> Optional[Dict[str, Any]]:
+    """Read a summary file, returning None if it is empty or half written"""
+    f.seek(0)
+    try:
+        return orjson.loads(f.read())
+    except orjson.JSONDecodeError:
+        return None
+
+def _write_summary(f: BinaryIO, summary: Dict[str, Any]) -> None:
+    """Rewrite a summary file opened by _locked_summary"""
+    f.truncate(0)
+    # Opened for appending, so this lands at the start of the emptied file
+    f.write(orjson.dumps(summary))
+    f.flush()
+
+def _file_size(file_path: str) -> int:
+    """Return the size of a file, 0 if it does not exist"""
+    try:
+        return os.stat(file_path).st_size
+    except FileNotFoundError:
+        return 0
+
+def _reindex_conversation(f: BinaryIO, conversation_id: str, file_path: str) -> Dict[str, Any]:
+    """
+    Rebuild a conversation's summary and postings from its file in one streaming pass.
+
+    Args:
+        f (BinaryIO): The conversation's summary file, locked
+        conversation_id (str): ID of the conversation
+        file_path (str): Path of the conversation file
+
+    Returns:
+        Dict[str, Any]: The new summary
+    """
+    size = _file_size(file_path)
+    message_count = 0
+    latest_timestamp = ""
+    records = []
+    for offset, message in enumerate(iter_conversation_file(file_path)):
+        message_count += 1
+        timestamp = message.get("timestamp", "")
+        if timestamp > latest_timestamp:
+            latest_timestamp = timestamp
+        records.append(_postings_record(conversation_id, offset, message))
+
+    _write_postings(conversation_id, records)
+    summary = {"message_count": message_count, "latest_timestamp": latest_timestamp or None, "size": size}
+    _write_summary(f, summary)
+    return summary
+
+def _current_summary(f: BinaryIO, conversation_id: str, file_path: str) -> Dict[str, Any]:
+    """
+    Return the summary of a conversation whose lock is held, reindexing it if stale.
+
+    A summary records the size of the file it describes, so a file changed
+    outside these writers (or a lost summary update) is detected and
+    reindexed instead of trusted. So is a conversation without postings.
+    """
+    summary = _read_summary(f)
+    if (summary is None or summary.get("size") != _file_size(file_path)
+            or not os.path.exists(postings_path(conversation_id))):
+        summary = _reindex_conversation(f, conversation_id, file_path)
+    return summary
+
+def write_conversation(conversation_id: str, history: List[Dict[str, Any]]) -> None:
+    """
+    Replace the whole history of a conversation.
+
+    Args:
+        conversation_id (str): ID of the conversation
+        history (List[Dict[str, Any]]): Conversation history
+    """
+    with _locked_summary(conversation_id) as summary_file:
+        _write_conversation(conversation_id, history)
+        _write_postings(conversation_id, [
+            _postings_record(conversation_id, offset, message) for offset, message in enumerate(history)
+        ])
+        size = _file_size(conversation_path(conversation_id))
+        _write_summary(summary_file, {**summarize_history(history), "size": size})
+
+def delete_conversation(conversation_id: str) -> bool:
+    """
+    Delete a conversation and its offloaded responses.
+
+    Args:
+        conversation_id (str): ID of the conversation
+
+    Returns:
+        bool: Whether the conversation existed
+    """
+    with _locked_summary(conversation_id) as summary_file:
+        file_path = conversation_path(conversation_id)
+        if not os.path.exists(file_path):
+            return False
+        # Also remove a legacy JSON file left behind by an interrupted migration
+        while os.path.exists(file_path):
+            os.remove(file_path)
+            file_path = conversation_path(conversation_id)
+        delete_response_blobs(conversation_id)
+        try:
+            os.remove(postings_path(conversation_id))
+        except FileNotFoundError:
+            pass
+        # The summary file stays behind as the lock; an empty summary matches the missing file
+        _write_summary(summary_file, {"message_count": 0, "latest_timestamp": None, "size": 0})
+        return True
+
+def clear_conversation(conversation_id: str) -> bool:
+    """
+    Remove every message of a conversation, keeping it as an empty conversation.
+
+    Args:
+        conversation_id (str): ID of the conversation
+
+    Returns:
+        bool: Whether the conversation existed
+    """
+    with _locked_summary(conversation_id) as summary_file:
+        if not os.path.exists(conversation_path(conversation_id)):
+            return False
+        # Truncate and drop the side files under one lock, so an append
+        # cannot land in between and lose its side file
+        _write_conversation(conversation_id, [])
+        delete_response_blobs(conversation_id)
+        _write_postings(conversation_id, [])
+        _write_summary(summary_file, {**summarize_history([]), "size": _file_size(conversation_path(conversation_id))})
+        return True
+
+def append_conversation_message(conversation_id: str, message: Dict[str, Any]) -> int:
+    """
+    Append one message to a conversation, migrating a legacy JSON file first.
+
+    Args:
+        conversation_id (str): ID of the conversation
+        message (Dict[str, Any]): The message entry
+
+    Returns:
+        int: Position of the message in the conversation history
+    """
+    return append_conversation_messages(conversation_id, [message])
+
+def append_conversation_messages(conversation_id: str, messages: List[Dict[str, Any]]) -> int:
+    """
+    Append messages to a conversation in a single write, migrating a legacy JSON file first.
+
+    The conversation's summary and search postings are updated under the
+    same lock as the append, so the returned position, and the one indexed,
+    is the line the first message actually landed on. Oversized responses
+    are moved to side files, but indexed in full.
+
+    Args:
+        conversation_id (str): ID of the conversation
+        messages (List[Dict[str, Any]]): The message entries, in order
+
+    Returns:
+        int: Position of the first new message in the conversation history
+    """
+    with _locked_summary(conversation_id) as summary_file:
+        # Side files are written under the lock that delete and clear take, and
+        # before the messages, so a stored reference never dangles
+        stored = [offload_large_response(conversation_id, message) for message in messages]
+
+        path = conversation_path(conversation_id)
+        if path.endswith(LEGACY_CONVERSATION_EXT):
+            _write_conversation(conversation_id, load_conversation_file(path))
+            path = conversation_path(conversation_id)
+        summary = _current_summary(summary_file, conversation_id, path)
+        first_offset = summary["message_count"]
+
+        os.makedirs(CONVERSATIONS_DIR, exist_ok=True)
+        records = b"".join(orjson.dumps(message) + b"\n" for message in stored)
+        size, written = _append_records(path, records)
+        _append_records(postings_path(conversation_id), b"".join(
+            _postings_record(conversation_id, offset, message) for offset, message in enumerate(messages, first_offset)
+        ))
+
+        latest = max((message.get("timestamp") or "" for message in messages), default="")
+        if summary["latest_timestamp"] is not None and summary["latest_timestamp"] > latest:
+            latest = summary["latest_timestamp"]
+        _write_summary(summary_file, {
+            "message_count": first_offset + len(messages),
+            "latest_timestamp": latest or None,
+            "size": size + written,
+        })
+    return first_offset
+
+# Responses longer than this many characters are stored in a side file and
+# the message keeps only a preview, so conversation files stay small to
+# read, list and search
+BLOB_THRESHOLD = 8192
+BLOB_PREVIEW_CHARS = 512
+BLOBS_DIR_SUFFIX = ".blobs"
+
+def conversation_blobs_dir(conversation_id: str) -> str:
+    """Return the directory holding a conversation's offloaded responses"""
+    return os.path.join(CONVERSATIONS_DIR, conversation_id + BLOBS_DIR_SUFFIX)
+
+def offload_large_response(conversation_id: str, message: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Move an oversized response out of a message into a side file.
+
+    The returned message keeps a preview as its response, plus the reference
+    and size needed to load the full text with load_response_blob.
+
+    Args:
+        conversation_id (str): ID of the conversation
+        message (Dict[str, Any]): The message entry
+
+    Returns:
+        Dict[str, Any]: The message to persist; the input itself if the response is small
+    """
+    response = message.get("response")
+    if not isinstance(response, str) or len(response) <= BLOB_THRESHOLD:
+        return message
+
+    data = response.encode("utf-8")
+    ref = uuid.uuid4().hex
+    blobs_dir = conversation_blobs_dir(conversation_id)
+    os.makedirs(blobs_dir, exist_ok=True)
+    with open(os.path.join(blobs_dir, ref + ".bin"), "wb") as f:
+        f.write(data)
+
+    return {
+        **message,
+        "response": response[:BLOB_PREVIEW_CHARS],
+        "response_ref": ref,
+        "response_bytes": len(data),
+    }
+
+def load_response_blob(conversation_id: str, ref: str) -> Optional[str]:
+    """
+    Load the full text of an offloaded response.
+
+    Args:
+        conversation_id (str): ID of the conversation
+        ref (str): The message's response_ref
+
+    Returns:
+        Optional[str]: The response, or None if there is no such blob
+    """
+    # References are generated hex UUIDs; reject anything else rather than
+    # letting a crafted one escape the blobs directory
+    if not ref.isalnum():
+        return None
+    try:
+        with open(os.path.join(conversation_blobs_dir(conversation_id), ref + ".bin"), "rb") as f:
+            return f.read().decode("utf-8")
+    except FileNotFoundError:
+        return None
+
+def resolve_response(conversation_id: str, message: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Replace the preview of an offloaded response with its full text.
+
+    Args:
+        conversation_id (str): ID of the conversation
+        message (Dict[str, Any]): The message entry
+
+    Returns:
+        Dict[str, Any]: The message with its full response; the input itself
+        if the response was not offloaded or its side file is gone
+    """
+    ref = message.get("response_ref")
+    if not ref:
+        return message
+    response = load_response_blob(conversation_id, ref)
+    if response is None:
+        return message
+    resolved = {key: value for key, value in message.items() if key not in ("response_ref", "response_bytes")}
+    resolved["response"] = response
+    return resolved
+
+def delete_response_blobs(conversation_id: str) -> None:
+    """Remove every offloaded response of a conversation"""
+    shutil.rmtree(conversation_blobs_dir(conversation_id), ignore_errors=True)
+
+def summarize_history(history: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build the index entry for a conversation history.
+
+    Args:
+        history (List[Dict[str, Any]]): Conversation history
+
+    Returns:
+        Dict[str, Any]: Message count and latest timestamp
+    """
+    latest_timestamp = None
+    if history:
+        latest_timestamp = max(message.get("timestamp", "") for message in history) or None
+
+    return {
+        "message_count": len(history),
+        "latest_timestamp": latest_timestamp
+    }
+
+def _stored_summary(conversation_id: str, file_path: str) -> Optional[Dict[str, Any]]:
+    """Read a conversation's summary without locking, returning None if it is missing or stale"""
+    try:
+        with open(summary_path(conversation_id), "rb") as f:
+            summary = orjson.loads(f.read())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        return None
+    if summary.get("size") != _file_size(file_path):
+        return None
+    return summary
+
+def _recount_summary(conversation_id: str) -> Dict[str, Any]:
+    """Bring a conversation's summary up to date under its lock"""
+    with _locked_summary(conversation_id) as summary_file:
+        return _current_summary(summary_file, conversation_id, conversation_path(conversation_id))
+
+def load_conversation_index() -> Dict[str, Dict[str, Any]]:
+    """
+    Load the summary of every conversation, recounting any that are stale.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Conversation ID to summary
+    """
+    summaries = {}
+    stale = []
+    for file_path in conversation_files():
+        conversation_id = conversation_id_from_path(file_path)
+        summary = _stored_summary(conversation_id, file_path)
+        if summary is None:
+            stale.append(conversation_id)
+        else:
+            summaries[conversation_id] = summary
+
+    # Recount the stale ones in parallel; the threads overlap the file reads
+    if stale:
+        with ThreadPoolExecutor(max_workers=INDEX_REBUILD_WORKERS) as pool:
+            summaries.update(zip(stale, pool.map(_recount_summary, stale)))
+
+    return {
+        conversation_id: {"message_count": summary["message_count"], "latest_timestamp": summary["latest_timestamp"]}
+        for conversation_id, summary in summaries.items()
+    }
+
+# Inverted index for conversation search: lowercase word token to the
+# (conversation_id, message_offset) pairs whose text contains it. Each
+# conversation's postings are a log next to its summary, starting with a
+# generation line and then one line per message, appended under the
+# conversation's lock. Every process keeps the merged index in memory and
+# before each search reads only what the logs gained since the last one.
+SEARCHABLE_FIELDS = ("user", "response")
+TOKEN_PATTERN = re.compile(r"\w+")
+
+_Postings = Dict[str, Set[Tuple[str, int]]]
+_search_index: _Postings = defaultdict(set)
+# Conversation ID to the tokens it contributed, so its postings can be dropped
+_search_tokens: Dict[str, Set[str]] = {}
+# Conversation ID to the generation line, bytes consumed and (inode, size,
+# mtime) of its postings log when last read
+_search_positions: Dict[str, Tuple[bytes, int, Tuple[int, int, int]]] = {}
+_search_lock = threading.Lock()
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+def _message_tokens(message: Dict[str, Any]) -> Set[str]:
+    """Collect the tokens of the searchable fields of a message"""
+    tokens = set()
+    for field in SEARCHABLE_FIELDS:
+        value = message.get(field)
+        if isinstance(value, str):
+            tokens.update(tokenize(value))
+    return tokens
+
+def postings_path(conversation_id: str) -> str:
+    """Return the file holding a conversation's search postings"""
+    return os.path.join(INDEX_DIR, conversation_id + POSTINGS_EXT)
+
+def _postings_record(conversation_id: str, offset: int, message: Dict[str, Any]) -> bytes:
+    """Encode the postings line of a message, indexing an offloaded response in full"""
+    message = resolve_response(conversation_id, message)
+    return orjson.dumps([offset, list(_message_tokens(message))]) + b"\n"
+
+def _write_postings(conversation_id: str, records: List[bytes]) -> None:
+    """Atomically replace a conversation's postings under a new generation"""
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    path = postings_path(conversation_id)
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(orjson.dumps(uuid.uuid4().hex) + b"\n" + b"".join(records))
+    os.replace(tmp_file, path)
+
+def _drop_postings(conversation_id: str) -> None:
+    """Remove a conversation's postings from the in-memory index"""
+    for token in _search_tokens.pop(conversation_id, ()):
+        token_postings = _search_index[token]
+        token_postings.difference_update([posting for posting in token_postings if posting[0] == conversation_id])
+        if not token_postings:
+            del _search_index[token]
+    _search_positions.pop(conversation_id, None)
+
+def _read_postings(conversation_id: str, file_path: str) -> None:
+    """Merge the lines a postings log gained since it was last read into the in-memory index"""
+    try:
+        f = open(file_path, "rb")
+    except FileNotFoundError:
+        _drop_postings(conversation_id)
+        return
+    with f:
+        stat = os.fstat(f.fileno())
+        generation = f.readline()
+        previous_generation, position, _ = _search_positions.get(conversation_id, (None, 0, None))
+        if generation != previous_generation:
+            # Rewritten since it was last read, so start over
+            _drop_postings(conversation_id)
+            position = len(generation)
+
+        f.seek(position)
+        data = f.read(stat.st_size - position)
+        # Only whole lines; one still being written is picked up next time
+        data = data[:data.rfind(b"\n") + 1]
+        tokens = _search_tokens.setdefault(conversation_id, set())
+        for line in data.splitlines():
+            try:
+                offset, message_tokens = orjson.loads(line)
+            except (orjson.JSONDecodeError, ValueError):
+                # A torn line from an interrupted append
+                continue
+            for token in message_tokens:
+                _search_index[token].add((conversation_id, offset))
+            tokens.update(message_tokens)
+        _search_positions[conversation_id] = (
+            generation, position + len(data), (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        )
+
+def _refresh_search_index() -> None:
+    """Bring the in-memory index up to date with every postings log; call with _search_lock held"""
+    seen = set()
+    try:
+        with os.scandir(INDEX_DIR) as entries:
+            for entry in entries:
+                if not entry.name.endswith(POSTINGS_EXT):
+                    continue
+                conversation_id = entry.name[:-len(POSTINGS_EXT)]
+                seen.add(conversation_id)
+                # A stat per log; only logs that changed are opened
+                stat = entry.stat()
+                known = _search_positions.get(conversation_id)
+                if known is None or known[2] != (stat.st_ino, stat.st_size, stat.st_mtime_ns):
+                    _read_postings(conversation_id, entry.path)
+    except FileNotFoundError:
+        pass
+
+    # Conversations deleted since the last refresh
+    for conversation_id in list(_search_tokens.keys() - seen):
+        _drop_postings(conversation_id)
+
+def load_search_index() -> _Postings:
+    """
+    Build the postings of any conversation missing them, then load every log into memory.
+
+    Returns:
+        Dict[str, Set[Tuple[str, int]]]: Token to postings
+    """
+    missing = [
+        conversation_id_from_path(file_path) for file_path in conversation_files()
+        if not os.path.exists(postings_path(conversation_id_from_path(file_path)))
+    ]
+    if missing:
+        with ThreadPoolExecutor(max_workers=INDEX_REBUILD_WORKERS) as pool:
+            list(pool.map(_recount_summary, missing))
+
+    with _search_lock:
+        _refresh_search_index()
+        return _search_index
+
+def _piece_postings(piece: str) -> Set[Tuple[str, int]]:
+    """Collect the postings of every indexed token containing a query piece; call with _search_lock held"""
+    matches = set(_search_index.get(piece, ()))
+    for token, token_postings in _search_index.items():
+        if piece in token and token != piece:
+            matches.update(token_postings)
+    return matches
+
+def search_candidates(query: str) -> Optional[Dict[str, List[int]]]:
+    """
+    Find the messages that may contain the query as a case-insensitive substring.
+
+    Each word-character run of the query must lie inside a single token of a
+    matching message, so a piece's candidates are the postings of every
+    indexed token containing it ("click" finds "clickhouse"), intersected
+    across pieces. Callers still verify the substring match on the returned
+    messages.
+
+    Args:
+        query (str): Search query
+
+    Returns:
+        Optional[Dict[str, List[int]]]: Conversation ID to sorted message offsets,
+        or None if the query has no words and every message has to be scanned
+    """
+    query_tokens = set(tokenize(query))
+    if not query_tokens:
+        return None
+
+    with _search_lock:
+        _refresh_search_index()
+        # Intersect starting from the rarest piece, so the working set stays small
+        piece_postings = sorted((_piece_postings(token) for token in query_tokens), key=len)
+        candidates = piece_postings[0]
+        for postings in piece_postings[1:]:
+            if not candidates:
+                break
+            candidates &= postings
+        if not candidates:
+            return {}
+
+    grouped = defaultdict(list)
+    for conversation_id, offset in candidates:
+        grouped[conversation_id].append(offset)
+    return {conversation_id: sorted(offsets) for conversation_id, offsets in grouped.items()}
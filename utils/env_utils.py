@@ -0,0 +1,16 @@
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+@lru_cache(maxsize=1)
+def load_env() -> bool:
+    """
+    Load the .env file into the environment.
+
+    Every entry point and shared module calls this at import; only the first
+    call parses the file.
+
+    Returns:
+        bool: Whether a .env file was found and loaded
+    """
+    return load_dotenv()
@@ -0,0 +1,119 @@
+import asyncio
+import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import logger
+from utils.conversation_utils import append_conversation_messages
+
+# A queued exchange: orchestrator ID, user input, response and user values
+_Exchange = Tuple[str, str, Any, Optional[Dict[str, Any]]]
+
+def build_history_entry(user_input: str, response: Any, user_values: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Build a conversation history entry for an exchange.
+
+    Args:
+        user_input (str): User input/question
+        response (Any): Response from the orchestrator
+        user_values (Dict[str, Any], optional): User-provided values used in the query
+
+    Returns:
+        Dict[str, Any]: The history entry
+    """
+    # The epoch copy of the timestamp lets readers filter by date with
+    # integer comparisons instead of parsing the ISO string
+    now = datetime.datetime.now()
+    entry = {
+        "timestamp": now.isoformat(),
+        "timestamp_epoch": int(now.timestamp()),
+        "user": user_input,
+        "response": response
+    }
+
+    # Add user values if provided
+    if user_values:
+        entry["user_values"] = user_values
+    return entry
+
+class HistoryWriter:
+    """
+    Write-behind queue for conversation history.
+
+    Every run path enqueues the finished exchange and carries on; a single
+    consumer task writes queued exchanges in batches off the event loop, so
+    no client waits on the disk write and exchanges land in the order they
+    were submitted.
+    """
+
+    def __init__(self, max_size: int = 1000, max_batch: int = 32):
+        self.max_size = max_size
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._consumer: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the consumer task on the running event loop"""
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._consumer = asyncio.create_task(self._consume())
+
+    async def stop(self) -> None:
+        """Flush everything queued so far and stop the consumer task"""
+        if self._consumer is None:
+            return
+        await self._queue.put(None)
+        await self._consumer
+        self._queue = None
+        self._consumer = None
+
+    async def submit(self, orchestrator_id: str, user_input: str, response: Any, user_values: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Queue an exchange to be saved to the conversation history.
+
+        Args:
+            orchestrator_id (str): ID of the orchestrator
+            user_input (str): User input/question
+            response (Any): Response from the orchestrator
+            user_values (Dict[str, Any], optional): User-provided values used in the query
+        """
+        exchange = (orchestrator_id, user_input, response, user_values)
+        if self._consumer is None:
+            # No consumer running (e.g. outside the app lifecycle), so save directly
+            await asyncio.to_thread(self._write_batch, [exchange])
+            return
+        # Waits only when the queue is full, which applies backpressure to producers
+        await self._queue.put(exchange)
+
+    async def _consume(self) -> None:
+        """Drain the queue, writing whatever has accumulated as one batch"""
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            stopping = None in batch
+            exchanges = [exchange for exchange in batch if exchange is not None]
+            if exchanges:
+                await asyncio.to_thread(self._write_batch, exchanges)
+            if stopping:
+                return
+
+    @staticmethod
+    def _write_batch(exchanges: List[_Exchange]) -> None:
+        """Save a batch of exchanges, logging failures instead of losing the rest"""
+        # Group by conversation, keeping arrival order, so each conversation
+        # gets one append and one index update for the whole batch
+        entries_by_orchestrator: Dict[str, List[Dict[str, Any]]] = {}
+        for orchestrator_id, user_input, response, user_values in exchanges:
+            entries_by_orchestrator.setdefault(orchestrator_id, []).append(
+                build_history_entry(user_input, response, user_values)
+            )
+
+        for orchestrator_id, entries in entries_by_orchestrator.items():
+            try:
+                append_conversation_messages(orchestrator_id, entries)
+                logger.info(f"Added {len(entries)} exchanges to conversation history for orchestrator {orchestrator_id}")
+            except Exception as e:
+                logger.error(f"Error saving conversation history for orchestrator {orchestrator_id}: {str(e)}")
+
+# Shared writer for every run path
+history_writer = HistoryWriter()
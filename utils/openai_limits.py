@@ -0,0 +1,62 @@
+import asyncio
+import os
+import random
+from typing import Any, Awaitable, Callable, Optional
+
+from openai import RateLimitError
+
+import logger
+
+# Maximum number of agent runs talking to the LLM backend at once, per worker
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+
+# Attempts per run before a rate-limit error is given up on, and the backoff bounds in seconds
+OPENAI_MAX_ATTEMPTS = 5
+OPENAI_BACKOFF_INITIAL = 1.0
+OPENAI_BACKOFF_MAX = 30.0
+
+_openai_semaphore: Optional[asyncio.Semaphore] = None
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """Return the semaphore shared by all runs, created on first use"""
+    global _openai_semaphore
+    if _openai_semaphore is None:
+        _openai_semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+    return _openai_semaphore
+
+def _retry_delay(error: RateLimitError, attempt: int) -> float:
+    """Seconds to wait before retrying, preferring the server's retry-after hint"""
+    retry_after = error.response.headers.get("retry-after") if error.response is not None else None
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), OPENAI_BACKOFF_MAX)
+        except ValueError:
+            pass
+    # Exponential backoff with full jitter
+    return random.uniform(0, min(OPENAI_BACKOFF_INITIAL * 2 ** (attempt - 1), OPENAI_BACKOFF_MAX))
+
+async def run_with_openai_limits(func: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Run an LLM-backed call under the shared concurrency cap, retrying rate-limit errors.
+
+    Args:
+        func (Callable[[], Awaitable[Any]]): Starts the call, e.g. a Runner.run invocation
+
+    Returns:
+        Any: Result of the call
+    """
+    semaphore = _get_semaphore()
+    attempt = 1
+    while True:
+        async with semaphore:
+            try:
+                return await func()
+            except RateLimitError as e:
+                if attempt >= OPENAI_MAX_ATTEMPTS:
+                    raise
+                delay = _retry_delay(e, attempt)
+
+        # Back off without holding a slot, so other runs can use it meanwhile
+        logger.warning(f"Rate limited by the LLM backend, retrying in {delay:.1f}s (attempt {attempt}/{OPENAI_MAX_ATTEMPTS})")
+        await asyncio.sleep(delay)
+        attempt += 1
@@ -1,17 +1,35 @@
 import os
 import ssl
 import httpx
+from typing import Optional
 from openai import AsyncOpenAI
 from agents.models._openai_shared import set_default_openai_client
 
+# Connection pool limits of the shared HTTP client; idle connections are kept
+# for a minute so bursts of agent turns skip the TLS handshake
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=60.0)
+
+# HTTP client shared by every executor, so all LLM calls reuse one connection pool
+_http_client: Optional[httpx.AsyncClient] = None
+
 def setup_ssl_bypass():
     """
     Sets up SSL bypass for the OpenAI client and returns the HTTP client.
+    
+    The client is created on the first call and returned by later calls, so
+    executors share its keep-alive connections; it is only rebuilt once closed.
     """
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        return _http_client
+    
     # Create a custom transport with SSL verification disabled
     transport = httpx.AsyncHTTPTransport(
         verify=False,  # Disable SSL verification
-        http2=True     # Enable HTTP/2 for better performance
+        # HTTP/1.1: each LLM call uses one or two streams, so HTTP/2
+        # multiplexing gains nothing over pooled keep-alive connections
+        http2=False,
+        limits=HTTP_LIMITS
     )
     
     # Create httpx client with the custom transport
@@ -34,4 +52,5 @@ def setup_ssl_bypass():
     # Disable SSL verification globally
     ssl._create_default_https_context = ssl._create_unverified_context
     
+    _http_client = http_client
     return http_client 
\ No newline at end of file
@@ -0,0 +1,94 @@
+import functools
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+import orjson
+
+import anyio
+import anyio.to_thread
+
+# Maximum number of blocking tool calls running in worker threads at once
+TOOL_THREAD_LIMIT = int(os.environ.get("TOOL_THREAD_LIMIT", "16"))
+
+_tool_limiter: Optional[anyio.CapacityLimiter] = None
+
+def get_tool_limiter() -> anyio.CapacityLimiter:
+    """Return the capacity limiter shared by all blocking tool calls"""
+    global _tool_limiter
+    if _tool_limiter is None:
+        _tool_limiter = anyio.CapacityLimiter(TOOL_THREAD_LIMIT)
+    return _tool_limiter
+
+def run_in_worker_thread(func: Callable[..., Any]) -> Callable[..., Awaitable[Any]]:
+    """
+    Turn a blocking tool function into a coroutine that runs it in a worker thread.
+
+    The agents SDK calls synchronous function tools directly on the event
+    loop, so a slow database query would stall every other stream served by
+    the worker. Apply this below @function_tool; functools.wraps keeps the
+    signature and docstring the SDK builds the tool schema from.
+
+    Args:
+        func (Callable[..., Any]): Blocking tool function
+
+    Returns:
+        Callable[..., Awaitable[Any]]: Async tool function
+    """
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return await anyio.to_thread.run_sync(
+            functools.partial(func, *args, **kwargs),
+            limiter=get_tool_limiter(),
+        )
+
+    return wrapper
+
+def memoize_tool_result(maxsize: int = 128) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Memoize a pure tool function on a hash of its arguments.
+
+    Agents often repeat a tool call with the same payload; the cached result
+    skips re-parsing and re-analysing it. The key covers the full arguments,
+    so entries never need invalidating. Only use on tools without side
+    effects, and apply below @function_tool.
+
+    Args:
+        maxsize (int): Maximum number of cached results, least recently used evicted first
+
+    Returns:
+        Callable[[Callable[..., Any]], Callable[..., Any]]: Decorator for the tool function
+    """
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        cache: "OrderedDict[bytes, Any]" = OrderedDict()
+        lock = threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            try:
+                key = hashlib.blake2b(
+                    orjson.dumps([args, kwargs], option=orjson.OPT_SORT_KEYS),
+                    digest_size=16,
+                ).digest()
+            except TypeError:
+                # Not JSON serializable, so it cannot be hashed
+                return func(*args, **kwargs)
+
+            with lock:
+                if key in cache:
+                    cache.move_to_end(key)
+                    return cache[key]
+
+            result = func(*args, **kwargs)
+            with lock:
+                cache[key] = result
+                if len(cache) > maxsize:
+                    cache.popitem(last=False)
+            return result
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
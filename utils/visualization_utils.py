@@ -1,25 +1,41 @@
 import json
 import os
-import pandas as pd
-import numpy as np
-from typing import List, Dict, Any, Tuple, Optional
+from typing import TYPE_CHECKING, Iterator, List, Dict, Any, Tuple, Optional, Union
 from datetime import datetime
 
-def is_time_series(data: List[Dict]) -> Tuple[bool, Optional[str]]:
+# pandas and numpy are imported where they are used, so importing the tools
+# at startup does not pay for loading them
+if TYPE_CHECKING:
+    import pandas as pd
+
+# The helpers below accept the rows or a DataFrame already built from them,
+# so a caller running several checks converts the rows only once
+Data = Union[List[Dict], "pd.DataFrame"]
+
+# Numeric dtype kinds: signed, unsigned, float and complex
+NUMERIC_KINDS = 'iufc'
+
+def _as_frame(data: Data) -> "pd.DataFrame":
+    """Return the data as a DataFrame, building one only from rows"""
+    import pandas as pd
+    return data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+
+def is_time_series(data: Data) -> Tuple[bool, Optional[str]]:
     """
     Determine if the data contains a time series column.
     
     Args:
-        data: List of dictionaries containing the data
+        data: List of dictionaries containing the data, or a DataFrame of it
         
     Returns:
         Tuple[bool, Optional[str]]: (is_time_series, time_column_name)
     """
-    if not data:
+    import pandas as pd
+    if data is None or len(data) == 0:
         return False, None
         
     # Convert to pandas DataFrame for easier analysis
-    df = pd.DataFrame(data)
+    df = _as_frame(data)
     
     # Check for common time/date column names
     common_time_cols = ['time', 'date', 'datetime', 'timestamp', 'created_at', 'updated_at']
@@ -45,59 +61,32 @@ def is_time_series(data: List[Dict]) -> Tuple[bool, Optional[str]]:
     
     return False, None
 
-def is_plottable(data: List[Dict]) -> bool:
+def is_plottable(data: Data) -> bool:
     """
     Determine if the data can be plotted.
     
     Args:
-        data: List of dictionaries containing the data
+        data: List of dictionaries containing the data, or a DataFrame of it
         
     Returns:
         bool: True if data can be plotted
     """
-    if not data:
+    if data is None or len(data) == 0:
         return False
         
     # Convert to pandas DataFrame
-    df = pd.DataFrame(data)
+    df = _as_frame(data)
     
     # Need at least one numeric column to plot
-    numeric_columns = df.select_dtypes(include=[np.number]).columns
-    return len(numeric_columns) > 0
+    return any(dtype.kind in NUMERIC_KINDS for dtype in df.dtypes)
 
-def determine_chart_type(data: List[Dict]) -> str:
-    """
-    Determine the best chart type for the data.
-    
-    Args:
-        data: List of dictionaries containing the data
-        
-    Returns:
-        str: Chart type ('line', 'bar', 'scatter', 'pie')
-    """
-    if not data:
-        return 'line'  # Default
-        
-    # Convert to pandas DataFrame
-    df = pd.DataFrame(data)
-    
-    # Check if it's time series
-    is_ts, _ = is_time_series(data)
+def _chart_type_for(num_records: int, num_numeric: int, num_categorical: int, is_ts: bool) -> str:
+    """Pick a chart type from the shape of the data"""
     if is_ts:
         return 'line'
-        
-    # Count number of records
-    num_records = len(df)
-    
-    # Count number of numeric columns
-    numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
-    num_numeric = len(numeric_columns)
-    
-    # Count categorical columns
-    categorical_columns = df.select_dtypes(include=['object']).columns.tolist()
     
     # If few records with one numeric column, pie chart could be good
-    if num_records <= 10 and num_numeric == 1 and len(categorical_columns) >= 1:
+    if num_records <= 10 and num_numeric == 1 and num_categorical >= 1:
         return 'pie'
     
     # If few records, bar chart is often better than line
@@ -115,38 +104,98 @@ def determine_chart_type(data: List[Dict]) -> str:
     # Default to bar chart
     return 'bar'
 
-def generate_html_plot(data: List[Dict], title: str = "Data Visualization") -> str:
+def describe_frame(df: "pd.DataFrame") -> Dict[str, Any]:
     """
-    Generate HTML with JavaScript for plotting the data using Chart.js.
+    Derive everything the visualization decisions need from a DataFrame,
+    selecting the column dtypes and detecting the time column only once.
     
     Args:
-        data: List of dictionaries containing the data
+        df: DataFrame of the data
+        
+    Returns:
+        Dict[str, Any]: plottable, is_time_series, time_column, chart_type,
+        numeric_columns and categorical_columns
+    """
+    import numpy as np
+    
+    # Classify the columns in one pass over the dtypes rather than one
+    # select_dtypes walk per group
+    numeric_columns = []
+    categorical_columns = []
+    for col, dtype in zip(df.columns, df.dtypes):
+        if dtype.kind in NUMERIC_KINDS:
+            numeric_columns.append(col)
+        elif dtype.kind == 'O' and isinstance(dtype, np.dtype):
+            categorical_columns.append(col)
+    is_ts, time_col = is_time_series(df)
+    
+    if len(df) == 0:
+        chart_type = 'line'  # Default
+    else:
+        chart_type = _chart_type_for(len(df), len(numeric_columns), len(categorical_columns), is_ts)
+    
+    return {
+        "plottable": len(numeric_columns) > 0,
+        "is_time_series": is_ts,
+        "time_column": time_col,
+        "chart_type": chart_type,
+        "numeric_columns": numeric_columns,
+        "categorical_columns": categorical_columns,
+    }
+
+def determine_chart_type(data: Data) -> str:
+    """
+    Determine the best chart type for the data.
+    
+    Args:
+        data: List of dictionaries containing the data, or a DataFrame of it
+        
+    Returns:
+        str: Chart type ('line', 'bar', 'scatter', 'pie')
+    """
+    if data is None or len(data) == 0:
+        return 'line'  # Default
+    
+    return describe_frame(_as_frame(data))["chart_type"]
+
+def iter_html_plot(data: Data, title: str = "Data Visualization") -> Iterator[str]:
+    """
+    Generate HTML with JavaScript for plotting the data using Chart.js, piece by piece.
+    
+    The page is yielded in fragments (one per data table row) so callers
+    writing it to disk never hold the whole document in memory.
+    
+    Args:
+        data: List of dictionaries containing the data, or a DataFrame of it
         title: Title of the chart
         
     Returns:
-        str: HTML string with embedded JavaScript for the chart
+        Iterator[str]: Fragments of the HTML page, in order
     """
-    if not data:
-        return "<p>No data to visualize</p>"
+    import pandas as pd
+    if data is None or len(data) == 0:
+        yield "<p>No data to visualize</p>"
+        return
         
     # Convert to pandas DataFrame
-    df = pd.DataFrame(data)
+    df = _as_frame(data)
     
-    # Check if data is plottable
-    if not is_plottable(data):
-        return "<p>Data cannot be visualized as a chart</p>"
+    # Column roles, time series detection and chart type, derived once
+    description = describe_frame(df)
     
-    # Determine chart type
-    chart_type = determine_chart_type(data)
+    # Check if data is plottable
+    if not description["plottable"]:
+        yield "<p>Data cannot be visualized as a chart</p>"
+        return
     
-    # Check for time series data
-    is_ts, time_col = is_time_series(data)
+    chart_type = description["chart_type"]
+    is_ts, time_col = description["is_time_series"], description["time_column"]
     
     # Select columns for visualization
     x_axis_col = time_col if is_ts else df.columns[0]
     
     # Find numeric columns for y-axis
-    numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+    numeric_columns = list(description["numeric_columns"])
     
     # If x-axis is numeric and in numeric_columns, remove it for y-axis
     if x_axis_col in numeric_columns:
@@ -158,7 +207,8 @@ def generate_html_plot(data: List[Dict], title: str = "Data Visualization") -> s
     
     # If still no numeric columns, return error
     if not numeric_columns:
-        return "<p>No suitable numeric columns found for visualization</p>"
+        yield "<p>No suitable numeric columns found for visualization</p>"
+        return
     
     # Prepare data for Chart.js
     x_values = df[x_axis_col].tolist()
@@ -238,8 +288,12 @@ def generate_html_plot(data: List[Dict], title: str = "Data Visualization") -> s
             "tooltipFormat": "ll HH:mm"
         }
     
+    # Data table header; rows are streamed below, missing values left blank
+    columns = list(df.columns)
+    header_cells = "".join(f"<th>{col}</th>" for col in columns)
+    
     # Create HTML
-    html = f"""<!DOCTYPE html>
+    yield f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -294,12 +348,15 @@ def generate_html_plot(data: List[Dict], title: str = "Data Visualization") -> s
             <table class="data-table">
                 <thead>
                     <tr>
-                        {"".join([f"<th>{col}</th>" for col in df.columns])}
+                        {header_cells}
                     </tr>
                 </thead>
                 <tbody>
-                    {"".join([f"<tr>{''.join([f'<td>{str(row[col]) if pd.notna(row[col]) else ''}</td>' for col in df.columns])}</tr>" for _, row in df.head(50).iterrows()])}
-                </tbody>
+"""
+    for row in df.head(50).itertuples(index=False, name=None):
+        cells = "".join(f"<td>{value if pd.notna(value) else ''}</td>" for value in row)
+        yield f"                    <tr>{cells}</tr>\n"
+    yield f"""                </tbody>
             </table>
             {"<p><em>Note: Showing first 50 rows</em></p>" if len(df) > 50 else ""}
         </div>
@@ -313,29 +370,38 @@ def generate_html_plot(data: List[Dict], title: str = "Data Visualization") -> s
 </body>
 </html>
 """
+
+def generate_html_plot(data: Data, title: str = "Data Visualization") -> str:
+    """
+    Generate HTML with JavaScript for plotting the data using Chart.js.
     
-    return html
+    Args:
+        data: List of dictionaries containing the data, or a DataFrame of it
+        title: Title of the chart
+        
+    Returns:
+        str: HTML string with embedded JavaScript for the chart
+    """
+    return "".join(iter_html_plot(data, title))
 
-def save_html_plot(data: List[Dict], filename: str, title: str = "Data Visualization") -> str:
+def save_html_plot(data: Data, filename: str, title: str = "Data Visualization") -> str:
     """
     Save data visualization as an HTML file.
     
     Args:
-        data: List of dictionaries containing the data
+        data: List of dictionaries containing the data, or a DataFrame of it
         filename: File name to save the HTML (without extension)
         title: Title of the chart
         
     Returns:
         str: Path to the saved HTML file
     """
-    html_content = generate_html_plot(data, title)
-    
     # Ensure the filename has .html extension
     if not filename.endswith('.html'):
         filename += '.html'
     
-    # Save the file
+    # Stream the page into the file as it is generated
     with open(filename, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+        f.writelines(iter_html_plot(data, title))
     
     return os.path.abspath(filename) 
\ No newline at end of file